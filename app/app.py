@@ -1,32 +1,262 @@
 # app.py
 import streamlit as st
-from ibm_watson_machine_learning.foundation_models import Model
 import tempfile
 import json
 import os
+import shutil
+import hashlib
+import atexit
+import copy
 import logging
+import textwrap
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
 import dotenv
 from document_classifier import DocumentClassifier, DocumentCategory
-from document_flow import DocumentProcessingFlow, integrate_document_flow
-from monitors import DocumentMonitor, setup_document_monitoring, trigger_scan_now, WorkflowScheduler
+
+# Use orjson for faster JSON parsing when it is installed
+try:
+    import orjson as json_parser
+except ImportError:
+    json_parser = json
+
+@st.cache_resource(show_spinner=False)
+def load_env_file():
+    """Load environment variables from the .env file once per process
+    
+    The script reruns on every interaction; Reset Configuration reloads the
+    file explicitly with override=True.
+    """
+    dotenv.load_dotenv()
+    return True
+
+def save_env_file(env_content, env_path=".env"):
+    """Atomically replace the .env file, skipping the write if nothing changed
+    
+    The content is written to a temporary file and renamed over the .env file,
+    so a crash mid-write never leaves a truncated configuration behind.
+    
+    Args:
+        env_content (str): Full content of the .env file
+        env_path (str, optional): Path to the .env file. Defaults to ".env".
+        
+    Returns:
+        bool: True if the file was written, False if it already had this content
+    """
+    data = env_content.encode("utf-8")
+    try:
+        with open(env_path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    
+    # A unique name in the same directory, so concurrent saves can't share a temporary file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(env_path)))
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, env_path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
 # Load environment variables from .env file
-dotenv.load_dotenv()
+load_env_file()
 
-# Import custom modules
-from aws_client import AWSS3Client
-from ms_graph import MSGraphClient
-from pdf_agent import WatsonxPDFAgent
-import logging
+# Heavy client modules (WatsonX SDK, boto3, msal, CrewAI agents) are imported
+# inside the functions that use them to keep the script's cold start cheap
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# WatsonX defaults used when the environment doesn't override them
+DEFAULT_WATSONX_MODEL_PARAMS = '{"decoding_method":"sample", "max_new_tokens":500, "temperature":0.5}'
+DEFAULT_WATSONX_PROJECT_ID = "ea1bfd72-28d6-4a4d-8668-c1de89865515"
+
+# Number of most recent chat messages rendered until the user expands the history
+DEFAULT_CHAT_HISTORY_WINDOW = 20
+
+def get_positive_int_env(name, default):
+    """Read a positive integer setting, falling back to the default if it is invalid
+    
+    Args:
+        name (str): Environment variable name
+        default (int): Value used when the variable is unset or not a number
+        
+    Returns:
+        int: The setting, at least 1
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        logger.warning(f"{name} must be a whole number, got {value!r}; using {default}")
+        return default
+    if number < 1:
+        logger.warning(f"{name} must be at least 1, got {number}; using 1")
+        return 1
+    return number
+
+@dataclass(frozen=True)
+class EnvConfig:
+    """Snapshot of the settings read from the environment and .env file"""
+    watsonx_api_key: str
+    watsonx_url: str
+    watsonx_model: str
+    watsonx_model_params: str
+    watsonx_project_id: str
+    aws_access_key_id: str
+    aws_secret_access_key: str
+    aws_region: str
+    s3_bucket_name: str
+    ms_client_id: str
+    ms_client_secret: str
+    ms_tenant_id: str
+    ms_user_email: str
+    auto_initialize: bool
+    autonomous_enabled: bool
+    pdf_staging_dir: str
+    chat_history_window: int
+    
+    @classmethod
+    def from_env(cls):
+        """Read all settings from the current environment
+        
+        Returns:
+            EnvConfig: Settings with defaults applied
+        """
+        return cls(
+            watsonx_api_key=os.getenv("WATSONX_API_KEY", ""),
+            watsonx_url=os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com"),
+            watsonx_model=os.getenv("WATSONX_MODEL", "meta-llama/llama-3-3-70b-instruct"),
+            watsonx_model_params=os.getenv("WATSONX_MODEL_PARAMS", DEFAULT_WATSONX_MODEL_PARAMS),
+            watsonx_project_id=os.getenv("WATSONX_PROJECT_ID", DEFAULT_WATSONX_PROJECT_ID),
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", ""),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", ""),
+            aws_region=os.getenv("AWS_REGION", "us-east-1"),
+            s3_bucket_name=os.getenv("S3_BUCKET_NAME", ""),
+            ms_client_id=os.getenv("MS_CLIENT_ID", ""),
+            ms_client_secret=os.getenv("MS_CLIENT_SECRET", ""),
+            ms_tenant_id=os.getenv("MS_TENANT_ID", ""),
+            ms_user_email=os.getenv("MS_USER_EMAIL", ""),
+            auto_initialize=os.getenv("AUTO_INITIALIZE", "false").lower() == "true",
+            autonomous_enabled=os.getenv("AUTONOMOUS_ENABLED", "false").lower() == "true",
+            pdf_staging_dir=os.getenv("PDF_STAGING_DIR", ""),
+            chat_history_window=get_positive_int_env("CHAT_HISTORY_WINDOW", DEFAULT_CHAT_HISTORY_WINDOW)
+        )
+
+@st.cache_resource(show_spinner=False)
+def get_env_config():
+    """Read the environment once per process; cleared by Reset Configuration
+    
+    Returns:
+        EnvConfig: Current settings
+    """
+    return EnvConfig.from_env()
+
+
+# Number of Summarize/Recommend responses kept for reuse across sessions
+ACTION_RESPONSE_CACHE_SIZE = 32
+
+# Number of S3 objects kept in the local download cache
+S3_PDF_CACHE_SIZE = 16
+
+# Number of PDFs "Download All PDFs" fetches at once, and at most per click;
+# half the cache so one click doesn't flush every other cached download
+S3_PREFETCH_WORKERS = 4
+S3_PREFETCH_LIMIT = S3_PDF_CACHE_SIZE // 2
+
+WELCOME_MESSAGE = """
+    👋 Welcome to the WatsonX PDF Agent! 
+
+    This AI-powered assistant helps you analyze and interact with your PDF documents.
+
+    **Getting Started:**
+    1. Visit the **Configuration** tab to set up your WatsonX API key and connections
+    2. Initialize the WatsonX model
+    3. Return here to upload or select a PDF document from your computer or S3
+
+    Once you've loaded a document, I can help you:
+    - Answer questions about the document content
+    - Generate comprehensive summaries
+    - Provide recommendations based on the document
+    - Send emails about the document (with Microsoft integration)
+    - Set reminders for future review
+    - Classify and organize your documents
+
+    Need help? Click on the 'Chat Commands' section after loading a document to see available commands.
+    """
+
+CHAT_COMMANDS_MARKDOWN = """
+    You can use these commands in the chat:
+    - **Send email to: [email]** - Send an email with a summary of this document
+    - **Remind me in [X] days/weeks** - Set a reminder to review this document later
+    - **Summarize** - Get a comprehensive summary
+    - **Recommend** or **Next steps** - Get recommendations based on the document
+    """
+
+CHAT_PLACEHOLDER_READY = "Ask a question, request a summary, or type 'send email to: someone@example.com'"
+CHAT_PLACEHOLDER_EMPTY = "Please upload or select a document first"
+
+# Chat reply when the document couldn't be prepared for querying
+PDF_NOT_PROCESSED_MESSAGE = "❌ I couldn't process this document. Please try loading it again."
+
+# Initial values for the per-session state, applied once per session in main()
+SESSION_DEFAULTS = {
+    'pdf_path': None,
+    'pdf_hash': None,
+    'pdf_file_name': None,
+    'pdf_details': None,
+    'pdf_search_tool': None,
+    'pdf_processed': False,
+    'pdf_tool_future': None,
+    'uploaded_file_id': None,
+    'pending_emails': [],
+    'show_full_chat_history': False,
+    'auto_init_attempted': False,
+    'pdf_agent': None,
+    'aws_s3_client': None,
+    'aws_buckets': [],
+    'current_s3_folder': "",
+    'current_s3_key': None,
+    'ms_graph_client': None,
+    'document_classifier': None,
+    'chat_markdown': [],
+    'messages': [{"role": "assistant", "content": WELCOME_MESSAGE}],
+}
+
 # Define a helper function to avoid circular imports
-# Add this to your app.py file to replace the existing get_custom_pdf_tool function
+@st.cache_resource(show_spinner=False)
+def get_custom_pdf_tool_class():
+    """
+    Import the CustomPDFSearchTool class once per process
+    
+    Imported like the other sibling modules; Streamlit puts the script's
+    directory on sys.path. Failed imports are not cached.
+    
+    Returns:
+        type: The CustomPDFSearchTool class
+    """
+    from custom_pdf_tool import CustomPDFSearchTool
+    logger.info("Successfully imported CustomPDFSearchTool")
+    return CustomPDFSearchTool
 
 def get_custom_pdf_tool(pdf_path, watsonx_model):
     """
-    Dynamically import and initialize the CustomPDFSearchTool to avoid circular imports
+    Initialize the CustomPDFSearchTool using the class imported by get_custom_pdf_tool_class
     
     Args:
         pdf_path (str): Path to the PDF file
@@ -35,50 +265,728 @@ def get_custom_pdf_tool(pdf_path, watsonx_model):
     Returns:
         CustomPDFSearchTool: Initialized PDF search tool
     """
-    import sys
-    import os
-    import logging
+    CustomPDFSearchTool = get_custom_pdf_tool_class()
     
-    # Get the local logger
-    local_logger = logging.getLogger(__name__)
+    # Initialize and return the tool
+    try:
+        logger.info(f"Initializing CustomPDFSearchTool with path: {pdf_path}")
+        return CustomPDFSearchTool(pdf_path, watsonx_model)
+    except Exception as e:
+        logger.error(f"Error initializing CustomPDFSearchTool: {str(e)}")
+        raise
+
+@st.cache_data(show_spinner=False)
+def parse_model_params(params_json):
+    """Parse a model parameters JSON string once per distinct value
+    
+    Args:
+        params_json (str): Model parameters as a JSON string
+        
+    Returns:
+        dict: Parsed model parameters
+        
+    Raises:
+        json.JSONDecodeError: If the string is not valid JSON (errors are not cached)
+    """
+    return json_parser.loads(params_json)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_watsonx_model(url, apikey, model_name, params_json, project_id):
+    """Create a WatsonX model, shared across reruns and sessions for the same settings
     
-    # Make sure we're importing from the correct location
-    app_dir = os.path.dirname(os.path.abspath(__file__))
-    if app_dir not in sys.path:
-        sys.path.insert(0, app_dir)
+    At most four models are kept, so switching models repeatedly doesn't
+    accumulate authenticated clients.
+
+    Args:
+        url (str): WatsonX service URL
+        apikey (str): WatsonX API key
+        model_name (str): Model identifier
+        params_json (str): Model parameters as a JSON string
+        project_id (str): WatsonX project ID
+
+    Returns:
+        Model: Initialized WatsonX model
+    """
+    from ibm_watson_machine_learning.foundation_models import Model
     
-    # Dynamic import to avoid circular references
-    try:
-        # First try normal import
-        from custom_pdf_tool import CustomPDFSearchTool
-        local_logger.info("Successfully imported CustomPDFSearchTool")
-    except ImportError as e:
-        local_logger.error(f"Import error: {str(e)}")
-        # Try a more explicit import if the normal one fails
-        import importlib.util
+    my_credentials = {
+        "url": url,
+        "apikey": apikey
+    }
+    params = parse_model_params(params_json)
+    space_id = None
+    verify = False
+
+    return Model(model_name, my_credentials, params, project_id, space_id, verify)
+
+@st.cache_resource(show_spinner=False)
+def get_s3_client(aws_access_key, aws_secret_key, aws_region, bucket_name=None):
+    """Create a connected AWS S3 client, shared across reruns and sessions
+
+    Args:
+        aws_access_key (str): AWS access key ID
+        aws_secret_key (str): AWS secret access key
+        aws_region (str): AWS region name
+        bucket_name (str, optional): Known bucket used to test the connection
+            instead of listing every bucket in the account
+
+    Returns:
+        AWSS3Client: Connected S3 client
+
+    Raises:
+        ConnectionError: If the connection to S3 fails (failures are not cached)
+    """
+    from aws_client import AWSS3Client
+    
+    s3_client = AWSS3Client(aws_access_key, aws_secret_key, aws_region)
+    if not s3_client.connect(bucket_name):
+        raise ConnectionError("Failed to connect to AWS S3")
+    return s3_client
+
+@st.cache_resource(show_spinner=False)
+def get_ms_graph_client(ms_client_id, ms_client_secret, ms_tenant_id, ms_user_email):
+    """Create an authenticated Microsoft Graph client, shared across reruns and sessions
+
+    Args:
+        ms_client_id (str): Microsoft app client ID
+        ms_client_secret (str): Microsoft app client secret
+        ms_tenant_id (str): Microsoft tenant ID
+        ms_user_email (str): Mailbox used to send emails
+
+    Returns:
+        MSGraphClient: Client holding a valid access token
+
+    Raises:
+        ConnectionError: If no access token could be obtained (failures are not cached)
+    """
+    from ms_graph import MSGraphClient
+    
+    ms_graph_client = MSGraphClient(ms_client_id, ms_client_secret, ms_tenant_id, ms_user_email)
+    if not ms_graph_client.get_token():
+        raise ConnectionError("Failed to connect to Microsoft Graph API")
+    return ms_graph_client
+
+def auto_init_watsonx_model(env):
+    """Create the WatsonX model from environment settings for auto-initialization"""
+    return get_watsonx_model(
+        env.watsonx_url,
+        env.watsonx_api_key,
+        env.watsonx_model,
+        env.watsonx_model_params,
+        env.watsonx_project_id
+    )
+
+def auto_init_s3_client(env):
+    """Connect to AWS S3 from environment settings and list the available buckets
+    
+    When S3_BUCKET_NAME is set, that bucket is the only one returned and the
+    account-wide bucket listing is skipped.
+    
+    Args:
+        env (EnvConfig): Environment settings
+    
+    Returns:
+        tuple: (AWSS3Client, list of bucket names)
+    """
+    s3_client = get_s3_client(
+        env.aws_access_key_id,
+        env.aws_secret_access_key,
+        env.aws_region,
+        env.s3_bucket_name
+    )
+    if env.s3_bucket_name:
+        return s3_client, [env.s3_bucket_name]
+    return s3_client, list_s3_buckets(get_s3_credentials_hash(s3_client), s3_client)
+
+def auto_init_ms_graph_client(env):
+    """Connect to Microsoft Graph from environment settings for auto-initialization"""
+    return get_ms_graph_client(
+        env.ms_client_id,
+        env.ms_client_secret,
+        env.ms_tenant_id,
+        env.ms_user_email
+    )
+
+def run_auto_init_tasks(tasks):
+    """Run independent initialization tasks concurrently
+    
+    The tasks only perform network I/O; all Streamlit output is left to the
+    caller so that it happens on the script thread.
+    
+    Args:
+        tasks (dict): Mapping of task name to a zero-argument callable
+        
+    Returns:
+        dict: Mapping of task name to a (result, error) tuple, where exactly one is None
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {executor.submit(task): name for name, task in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = (future.result(), None)
+            except Exception as e:
+                logger.error(f"Auto-initialization of {name} failed: {str(e)}")
+                results[name] = (None, e)
+    return results
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_pdf_search_tool(pdf_hash, model_id, _pdf_path, _watsonx_model):
+    """Build the PDF search tool for a document, reused for the same PDF content and model
+    
+    Only the four most recently used tools are kept to bound memory.
+    
+    Args:
+        pdf_hash (str): Content hash of the PDF, used as the cache key
+        model_id (str): WatsonX model identifier, used as the cache key
+        _pdf_path (str): Path to the PDF file (not hashed)
+        _watsonx_model: WatsonX model instance (not hashed)
+        
+    Returns:
+        CustomPDFSearchTool: Initialized PDF search tool
+    """
+    # DocklingPDFTool copies the PDF into its knowledge directory, so the path is used as is
+    return get_custom_pdf_tool(_pdf_path, _watsonx_model)
+
+@st.cache_resource(show_spinner=False)
+def get_background_executor():
+    """Get the worker pool used to prepare documents in the background
+    
+    Returns:
+        ThreadPoolExecutor: Executor shared across reruns and sessions
+    """
+    return ThreadPoolExecutor(max_workers=2)
+
+def start_pdf_processing():
+    """Start building the PDF search tool for the loaded document on a background worker
+    
+    The future is stored in st.session_state.pdf_tool_future so the first query
+    only waits for whatever parsing is still left.
+    """
+    if not st.session_state.pdf_path or not st.session_state.pdf_agent:
+        return
+    
+    watsonx_model = st.session_state.pdf_agent.model
+    st.session_state.pdf_tool_future = get_background_executor().submit(
+        get_pdf_search_tool,
+        st.session_state.pdf_hash,
+        watsonx_model.model_id,
+        st.session_state.pdf_path,
+        watsonx_model
+    )
+
+def ensure_pdf_processed():
+    """Make sure the PDF search tool for the loaded document is ready
+    
+    Waits for the background build started by start_pdf_processing, or starts
+    one if the document was loaded before the model was initialized.
+    
+    Returns:
+        bool: True if the document is ready to be queried, False otherwise
+    """
+    if st.session_state.pdf_processed:
+        return True
+    
+    if not st.session_state.pdf_path or not st.session_state.pdf_agent:
+        return False
+    
+    if st.session_state.pdf_tool_future is None:
+        start_pdf_processing()
+    
+    with st.spinner("Processing document..."):
         try:
-            module_path = os.path.join(app_dir, "custom_pdf_tool.py")
-            local_logger.info(f"Trying to import from specific path: {module_path}")
+            st.session_state.pdf_search_tool = st.session_state.pdf_tool_future.result()
+            st.session_state.pdf_tool_future = None
+            st.session_state.pdf_agent.pdf_search_tool = st.session_state.pdf_search_tool
+            st.session_state.pdf_processed = True
+            return True
+        except Exception as e:
+            # Allow the next query to retry
+            st.session_state.pdf_tool_future = None
+            st.error(f"Error initializing PDF search tool: {str(e)}")
+            logger.error(f"Error initializing PDF search tool: {str(e)}")
+            return False
+
+def get_s3_credentials_hash(s3_client):
+    """Hash the client's access key for use in cache keys
+    
+    Args:
+        s3_client (AWSS3Client): S3 client
+        
+    Returns:
+        str: SHA-256 hex digest of the access key
+    """
+    return hashlib.sha256(s3_client.aws_access_key.encode()).hexdigest()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def list_s3_buckets(credentials_hash, _s3_client):
+    """List the account's S3 buckets, reused for five minutes
+    
+    Args:
+        credentials_hash (str): Hash of the AWS access key, so different accounts don't share entries
+        _s3_client (AWSS3Client): Connected S3 client (not hashed)
+        
+    Returns:
+        list: Bucket names
+    """
+    return _s3_client.list_buckets()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def list_s3_items(bucket_name, prefix, credentials_hash, _s3_client):
+    """List the folders and PDFs under an S3 prefix, reused for five minutes
+    
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        prefix (str): Folder prefix to list
+        credentials_hash (str): Hash of the AWS access key, so different accounts don't share entries
+        _s3_client (AWSS3Client): Connected S3 client (not hashed)
+        
+    Returns:
+        list: Folder and PDF items as returned by AWSS3Client.list_pdfs
+    """
+    return _s3_client.list_pdfs(bucket_name, prefix=prefix)
+
+@st.cache_resource(show_spinner=False)
+def get_temp_root():
+    """Get the process-wide directory that holds all temporary PDFs
+    
+    Created under PDF_STAGING_DIR when set (e.g. /dev/shm to keep PDFs in RAM),
+    otherwise under the system temporary directory. The directory is removed
+    when the process exits.
+    
+    Returns:
+        str: Path to the temporary root directory
+    """
+    # Resolve once so every PDF path built under it is already absolute
+    temp_root = os.path.abspath(tempfile.mkdtemp(prefix="wx_agent_", dir=get_env_config().pdf_staging_dir or None))
+    atexit.register(shutil.rmtree, temp_root, ignore_errors=True)
+    return temp_root
+
+def get_session_tmpdir():
+    """Get the temporary directory holding this session's PDFs, creating it if needed
+    
+    Returns:
+        str: Path to the session's temporary directory
+    """
+    tmpdir = st.session_state.get('tmpdir')
+    if not tmpdir or not os.path.isdir(tmpdir):
+        tmpdir = tempfile.mkdtemp(prefix="session_", dir=get_temp_root())
+        st.session_state.tmpdir = tmpdir
+    return tmpdir
+
+@st.cache_resource(show_spinner=False)
+def get_s3_pdf_cache_dir():
+    """Get the directory where PDFs downloaded from S3 are cached across sessions
+    
+    Returns:
+        str: Path to the S3 PDF cache directory
+    """
+    cache_dir = os.path.join(get_temp_root(), "s3_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+@st.cache_resource(show_spinner=False)
+def get_s3_download_locks():
+    """Get the per-object locks that serialize downloads into the S3 PDF cache
+    
+    Returns:
+        tuple: (dict of cache entry directory to threading.Lock, threading.Lock guarding the dict)
+    """
+    return {}, threading.Lock()
+
+def download_s3_pdf(s3_client, bucket_name, object_key, link_dir=None):
+    """Download a PDF from S3, reusing the cached copy while its ETag is unchanged
+    
+    The object is downloaded to a temporary file in the cache entry and renamed
+    into place, so the cached PDF is always complete; concurrent loads of the
+    same object wait for each other instead of downloading it twice.
+    
+    Args:
+        s3_client: AWS S3 client instance
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): Key of the PDF object
+        link_dir (str, optional): Directory to hardlink the PDF into while the cache
+            entry is still locked, so pruning can't remove it first
+        
+    Returns:
+        tuple: (path, pdf_hash) - the local copy of the PDF (the link when link_dir
+            is given) and its content hash, or (None, None) if the download failed
+    """
+    key_hash = hashlib.sha1(object_key.encode()).hexdigest()
+    object_dir = os.path.join(get_s3_pdf_cache_dir(), f"{bucket_name}__{key_hash}")
+    
+    # Keep the original file name so it is what the user sees
+    local_path = os.path.join(object_dir, os.path.basename(object_key))
+    etag_path = os.path.join(object_dir, ".etag")
+    # The content hash is stored with the ETag so cache hits don't rehash the file
+    hash_path = os.path.join(object_dir, ".sha256")
+    
+    locks, locks_guard = get_s3_download_locks()
+    with locks_guard:
+        object_lock = locks.setdefault(object_dir, threading.Lock())
+    
+    with object_lock:
+        os.makedirs(object_dir, exist_ok=True)
+        
+        # One HEAD request gives both the ETag to validate the cache and the size to preallocate
+        object_info = s3_client.get_object_info(bucket_name, object_key) or {}
+        etag = object_info.get('ETag')
+        is_cached = False
+        if etag and os.path.exists(local_path) and os.path.exists(etag_path):
+            with open(etag_path, "r") as etag_file:
+                is_cached = etag_file.read() == etag
+        
+        if is_cached:
+            logger.info(f"Using cached copy of s3://{bucket_name}/{object_key}")
+            # Mark the entry as recently used
+            os.utime(object_dir)
+            try:
+                with open(hash_path, "r") as hash_file:
+                    pdf_hash = hash_file.read()
+            except FileNotFoundError:
+                pdf_hash = compute_file_hash(local_path)
+                write_s3_cache_file(hash_path, pdf_hash)
+        else:
+            # Invalidate the cached copy before replacing it
+            try:
+                os.unlink(etag_path)
+            except FileNotFoundError:
+                pass
+            
+            fd, download_path = tempfile.mkstemp(suffix=".part", dir=object_dir)
+            os.close(fd)
+            if not s3_client.download_file(bucket_name, object_key, download_path, expected_size=object_info.get('ContentLength')):
+                try:
+                    os.unlink(download_path)
+                except OSError:
+                    pass
+                return None, None
+            os.replace(download_path, local_path)
             
-            spec = importlib.util.spec_from_file_location("custom_pdf_tool", module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            pdf_hash = compute_file_hash(local_path)
+            write_s3_cache_file(hash_path, pdf_hash)
             
-            CustomPDFSearchTool = module.CustomPDFSearchTool
-            local_logger.info("Successfully imported CustomPDFSearchTool using importlib")
-        except Exception as e2:
-            local_logger.error(f"Failed to import using importlib: {str(e2)}")
-            raise ImportError(f"Could not import CustomPDFSearchTool: {str(e)} and then {str(e2)}")
+            # Record the ETag only once the complete file and its hash are in place
+            if etag:
+                write_s3_cache_file(etag_path, etag)
+        
+        if link_dir:
+            local_path = link_pdf_into_dir(local_path, link_dir)
     
-    # Initialize and return the tool
+    if not is_cached:
+        prune_s3_pdf_cache(keep=object_dir)
+    return local_path, pdf_hash
+
+def write_s3_cache_file(path, content):
+    """Atomically write a small metadata file into an S3 cache entry
+    
+    Args:
+        path (str): Path of the file to write
+        content (str): Text to write
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as tmp_file:
+        tmp_file.write(content)
+    os.replace(tmp_path, path)
+
+def prune_s3_pdf_cache(keep=None):
+    """Remove the least recently used S3 downloads beyond S3_PDF_CACHE_SIZE
+    
+    Sessions open S3 PDFs through their own hardlinks (see download_s3_pdf's
+    link_dir), so removing a cache entry never deletes a document a session is
+    using. Entries whose lock is held are being downloaded or linked and are skipped.
+    
+    Args:
+        keep (str, optional): Cache entry directory that must not be removed
+    """
+    cache_dir = get_s3_pdf_cache_dir()
     try:
-        local_logger.info(f"Initializing CustomPDFSearchTool with path: {pdf_path}")
-        return CustomPDFSearchTool(pdf_path, watsonx_model)
+        entries = sorted(
+            (entry for entry in os.scandir(cache_dir) if entry.is_dir() and entry.path != keep),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+    except OSError as e:
+        logger.warning(f"Could not scan S3 PDF cache: {str(e)}")
+        return
+    
+    # The kept entry takes one of the slots
+    locks, locks_guard = get_s3_download_locks()
+    for entry in entries[S3_PDF_CACHE_SIZE - 1:]:
+        with locks_guard:
+            entry_lock = locks.setdefault(entry.path, threading.Lock())
+        if not entry_lock.acquire(blocking=False):
+            continue
+        try:
+            logger.info(f"Removing cached S3 download {entry.name}")
+            shutil.rmtree(entry.path, ignore_errors=True)
+        finally:
+            entry_lock.release()
+
+def prefetch_s3_pdfs(s3_client, bucket_name, object_keys):
+    """Download several PDFs into the S3 cache concurrently
+    
+    Downloads are network-bound and boto3 releases the GIL while waiting, so a
+    small thread pool is enough; loading one of the PDFs afterwards is a cache hit.
+    Each download may evict older cache entries, but documents sessions have open
+    are their own hardlinks and stay on disk.
+    
+    Args:
+        s3_client: AWS S3 client instance
+        bucket_name (str): Name of the S3 bucket
+        object_keys (list): Keys of the PDF objects
+        
+    Returns:
+        list: Keys that could not be downloaded
+    """
+    failed = []
+    with ThreadPoolExecutor(max_workers=S3_PREFETCH_WORKERS) as executor:
+        futures = {
+            executor.submit(download_s3_pdf, s3_client, bucket_name, object_key): object_key
+            for object_key in object_keys
+        }
+        for future in as_completed(futures):
+            object_key = futures[future]
+            try:
+                local_path, _ = future.result()
+                if not local_path:
+                    failed.append(object_key)
+            except Exception as e:
+                logger.error(f"Error prefetching {object_key}: {str(e)}")
+                failed.append(object_key)
+    return failed
+
+def link_pdf_into_dir(cached_path, target_dir):
+    """Give a session its own hardlink to a PDF in the S3 download cache
+    
+    The cache evicts entries regardless of which sessions have them open; the
+    session's link keeps the file's data alive until the session moves on.
+    
+    Args:
+        cached_path (str): Path to the PDF in the S3 download cache
+        target_dir (str): The session's temporary directory
+        
+    Returns:
+        str: Path to the PDF in the target directory
+    """
+    session_path = os.path.join(target_dir, os.path.basename(cached_path))
+    link_path = f"{session_path}.part"
+    try:
+        os.unlink(link_path)
+    except FileNotFoundError:
+        pass
+    
+    # Both directories live under the temp root, so linking only fails on unusual filesystems
+    try:
+        os.link(cached_path, link_path)
+    except OSError:
+        shutil.copy2(cached_path, link_path)
+    os.replace(link_path, session_path)
+    return session_path
+
+def set_current_pdf(pdf_path, pdf_hash=None):
+    """Make a newly saved PDF the session's current document
+    
+    Deletes the previous document's file if it was saved in the session's temporary
+    directory, so each session keeps at most one PDF on disk. S3 downloads are
+    hardlinked into that directory, so their cached copies are left in place for reuse.
+    
+    Args:
+        pdf_path (str): Absolute path to the new PDF file
+        pdf_hash (str, optional): Content hash of the file, if already known.
+            Computed from the file if None.
+    """
+    previous_path = st.session_state.pdf_path
+    if (previous_path and previous_path != pdf_path and os.path.exists(previous_path)
+            and os.path.dirname(previous_path) == st.session_state.get('tmpdir')):
+        try:
+            os.unlink(previous_path)
+        except OSError as e:
+            logger.warning(f"Could not remove previous PDF {previous_path}: {str(e)}")
+    
+    st.session_state.pdf_path = pdf_path
+    st.session_state.pdf_hash = pdf_hash or compute_file_hash(pdf_path)
+    st.session_state.pdf_file_name = os.path.basename(pdf_path)
+    st.session_state.pdf_details = None
+    st.session_state.pdf_processed = False
+    st.session_state.pdf_tool_future = None
+    
+    # Drop the previous document's search tool so it can't answer for the new one
+    st.session_state.pdf_search_tool = None
+    if st.session_state.pdf_agent:
+        st.session_state.pdf_agent.pdf_search_tool = None
+
+def compute_file_hash(file_path, chunk_size=1024 * 1024):
+    """Compute a SHA-256 content hash for a file, used as a cache key for parsed PDFs
+    
+    Uses hashlib.file_digest where available (Python 3.11+), which hashes into a
+    reused buffer with OpenSSL's hardware-accelerated SHA-256.
+    
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int, optional): Number of bytes read per iteration when
+            file_digest is unavailable. Defaults to 1 MiB.
+        
+    Returns:
+        str: Hex digest of the file contents
+    """
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        
+        file_hash = hashlib.sha256()
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_cached_document_metadata(pdf_hash, _pdf_agent, _pdf_path):
+    """Get document metadata, cached by PDF content hash across reruns
+    
+    Only the 32 most recently used documents are kept.
+    
+    Args:
+        pdf_hash (str): Content hash of the PDF (the cache key)
+        _pdf_agent: WatsonxPDFAgent used to extract the metadata (not hashed)
+        _pdf_path (str): Path to the PDF file (not hashed)
+        
+    Returns:
+        dict: Document metadata
+    """
+    return _pdf_agent.get_document_metadata(_pdf_path)
+
+@st.cache_resource(show_spinner=False)
+def get_action_response_cache():
+    """Get the process-wide cache of Summarize/Recommend responses
+    
+    Responses are keyed by (pdf_hash, model_id, prompt). This is the only
+    response cache; the PDF agent always calls the model. A plain dict is used
+    instead of st.cache_data because responses are streamed into the chat first
+    and only stored once complete.
+    
+    Returns:
+        tuple: (OrderedDict of responses in LRU order, threading.Lock guarding it)
+    """
+    return OrderedDict(), threading.Lock()
+
+def stream_agent_response(prompt):
+    """Stream the PDF agent's answer to a prompt into the current chat message
+    
+    Args:
+        prompt (str): User prompt
+        
+    Returns:
+        tuple: (response, True) once the answer is complete, or (error message, False)
+            if generation failed; the error is shown below any partially streamed text
+    """
+    try:
+        response = st.write_stream(
+            st.session_state.pdf_agent.process_document_stream(st.session_state.pdf_path, prompt)
+        )
+        return response, True
     except Exception as e:
-        local_logger.error(f"Error initializing CustomPDFSearchTool: {str(e)}")
-        raise
+        error_message = f"❌ Error processing document: {str(e)}"
+        st.markdown(error_message)
+        return error_message, False
+
+def run_document_action(prompt, state_key):
+    """Answer a Summarize/Recommend button prompt for the current document
+    
+    Cached responses are shown immediately; otherwise the response is streamed
+    into the chat as it is generated and cached once complete. The response is
+    added to the chat history. If the document can't be processed or generation
+    fails, a single error reply is added instead and nothing is cached or saved
+    for email use.
+    
+    Args:
+        prompt (str): Action prompt
+        state_key (str): Session state entry the response is saved under for email use
+        
+    Returns:
+        str: Agent response or error message
+    """
+    pdf_agent = st.session_state.pdf_agent
+    cache_key = (st.session_state.pdf_hash, pdf_agent.model.model_id, prompt)
+    responses, lock = get_action_response_cache()
+    with lock:
+        response = responses.get(cache_key)
+        if response is not None:
+            responses.move_to_end(cache_key)
+    
+    with st.chat_message('assistant'):
+        if response is not None:
+            st.markdown(response)
+        else:
+            if not ensure_pdf_processed():
+                st.markdown(PDF_NOT_PROCESSED_MESSAGE)
+                st.session_state.messages.append({'role': 'assistant', 'content': PDF_NOT_PROCESSED_MESSAGE})
+                return PDF_NOT_PROCESSED_MESSAGE
+            
+            response, succeeded = stream_agent_response(prompt)
+            if not succeeded:
+                st.session_state.messages.append({'role': 'assistant', 'content': response})
+                return response
+            
+            # Only complete responses are cached
+            with lock:
+                responses[cache_key] = response
+                if len(responses) > ACTION_RESPONSE_CACHE_SIZE:
+                    responses.popitem(last=False)
+    
+    # A cache hit skips the agent, so save the response here as well
+    st.session_state[state_key] = response
+    st.session_state.messages.append({'role': 'assistant', 'content': response})
+    return response
+
+def format_document_details(metadata):
+    """Format document metadata as markdown for the Document Details expander
+    
+    Args:
+        metadata (dict): Document metadata from get_cached_document_metadata
+        
+    Returns:
+        str: Markdown with one line per field and a bullet list of topics, or an
+            empty string if the metadata could not be extracted
+    """
+    if "error" in metadata:
+        return ""
+    
+    details = "  \n".join([
+        f"**Title:** {metadata.get('title', 'Unknown')}",
+        f"**Author:** {metadata.get('author', 'Unknown')}",
+        f"**Date:** {metadata.get('date', 'Unknown')}",
+        f"**Size:** {metadata.get('file_size', 0) / 1024:.1f} KB"
+    ])
+    
+    topics = metadata.get("topics")
+    if topics:
+        details += "\n\n**Main Topics:**\n" + "\n".join(f"- {topic}" for topic in topics)
+    return details
+
 # Modify the classify_and_organize_document function in app.py to save classification results
 
+@st.cache_data(show_spinner=False, ttl=24 * 3600, max_entries=64)
+def get_cached_classification(pdf_hash, model_id, _classifier, _pdf_path):
+    """Classify a document, reused for the same PDF content and model
+    
+    Args:
+        pdf_hash (str): Content hash of the PDF, used as the cache key
+        model_id (str): WatsonX model identifier, used as the cache key
+        _classifier: DocumentClassifier used on a cache miss (not hashed)
+        _pdf_path (str): Path to the PDF file (not hashed)
+        
+    Returns:
+        tuple: (DocumentCategory, confidence_score, details, custom_category_name)
+        
+    Raises:
+        RuntimeError: If classification failed (errors are not cached)
+    """
+    classification = _classifier.classify_document(_pdf_path)
+    if classification[2].startswith("Classification error"):
+        raise RuntimeError(classification[2])
+    return classification
+
 def classify_and_organize_document(pdf_path, bucket_name=None, original_key=None):
     """Classify and organize a document
     
@@ -95,15 +1003,27 @@ def classify_and_organize_document(pdf_path, bucket_name=None, original_key=None
     
     # Classify the document
     try:
-        category, confidence, reasoning, custom_category_name = st.session_state.document_classifier.classify_document(pdf_path)
+        classifier = st.session_state.document_classifier
+        if pdf_path == st.session_state.pdf_path:
+            pdf_hash = st.session_state.pdf_hash
+        else:
+            pdf_hash = compute_file_hash(pdf_path)
+        classification = get_cached_classification(
+            pdf_hash,
+            classifier.model.model_id,
+            classifier,
+            pdf_path
+        )
+        category, confidence, reasoning, custom_category_name = classification
         
         # If a bucket is specified, organize the document in S3
         if bucket_name and st.session_state.aws_s3_client:
-            result = st.session_state.document_classifier.organize_document(
+            result = classifier.organize_document(
                 st.session_state.aws_s3_client,
                 pdf_path,
                 bucket_name,
-                original_key
+                original_key,
+                classification=classification
             )
             
             # Save classification results for email use
@@ -141,7 +1061,6 @@ def classify_and_organize_document(pdf_path, bucket_name=None, original_key=None
 
 def add_autonomous_features(tab1, tab2):
     """Add autonomous agent features to the Streamlit UI"""
-    import streamlit as st
     from document_flow import DocumentProcessingFlow, integrate_document_flow
     
     # Now using the tabs passed as parameters instead of trying to access local variables
@@ -310,7 +1229,6 @@ def add_autonomous_features(tab1, tab2):
                                 st.warning("No buckets configured for monitoring. Please select buckets to monitor in the Configuration tab.")
                         except Exception as e:
                             st.error(f"Error during scan: {str(e)}")
-                            import traceback
                             st.code(traceback.format_exc())
                 
                 if st.button("Debug: Process First Document"):
@@ -319,7 +1237,12 @@ def add_autonomous_features(tab1, tab2):
                             # Get document list
                             if 'aws_s3_client' in st.session_state and 'monitored_buckets' in st.session_state:
                                 bucket_name = st.session_state.monitored_buckets[0]
-                                s3_items = st.session_state.aws_s3_client.list_pdfs(bucket_name)
+                                s3_items = list_s3_items(
+                                    bucket_name,
+                                    "",
+                                    get_s3_credentials_hash(st.session_state.aws_s3_client),
+                                    st.session_state.aws_s3_client
+                                )
                                 
                                 if s3_items and len(s3_items) > 0:
                                     # Get first PDF
@@ -361,14 +1284,11 @@ def add_autonomous_features(tab1, tab2):
                                 st.error("AWS client or monitored buckets not configured")
                         except Exception as e:
                             st.error(f"Error during direct processing: {str(e)}")
-                            import traceback
                             st.code(traceback.format_exc())
 
 # Add to the document info section in Chat tab
 def add_autonomous_actions(file_name):
     """Add autonomous agent action suggestions to document display"""
-    import streamlit as st
-    
     # Create a suggestions section for autonomous actions
     with st.expander("🤖 Agent Suggestions"):
         st.write("**Based on this document, I suggest:**")
@@ -438,734 +1358,743 @@ def add_autonomous_actions(file_name):
     if 'suggested_workflow' in st.session_state:
         st.info(f"Suggested workflow: {st.session_state.suggested_workflow}")
 
-def main():
-    st.title('WatsonX PDF Agent 🤖')
-    st.caption("🚀 An enhanced agent powered by WatsonX.ai with AWS S3 & Microsoft 365 Email capabilities")
-
-    # Session state initialization
-    if 'pdf_path' not in st.session_state:
-        st.session_state.pdf_path = None
-
-    if 'pdf_search_tool' not in st.session_state:
-        st.session_state.pdf_search_tool = None
-        
-    if 'pdf_agent' not in st.session_state:
-        st.session_state.pdf_agent = None
-        
-    if 'aws_s3_client' not in st.session_state:
-        st.session_state.aws_s3_client = None
-        
-    if 'ms_graph_client' not in st.session_state:
-        st.session_state.ms_graph_client = None
-
-    if 'document_classifier' not in st.session_state:
-        st.session_state.document_classifier = None
-        
-    if 'messages' not in st.session_state:
-        st.session_state.messages = [{"role": "assistant", "content": """
-    👋 Welcome to the WatsonX PDF Agent! 
-
-    This AI-powered assistant helps you analyze and interact with your PDF documents.
-
-    **Getting Started:**
-    1. Visit the **Configuration** tab to set up your WatsonX API key and connections
-    2. Initialize the WatsonX model
-    3. Return here to upload or select a PDF document from your computer or S3
-
-    Once you've loaded a document, I can help you:
-    - Answer questions about the document content
-    - Generate comprehensive summaries
-    - Provide recommendations based on the document
-    - Send emails about the document (with Microsoft integration)
-    - Set reminders for future review
-    - Classify and organize your documents
-
-    Need help? Click on the 'Chat Commands' section after loading a document to see available commands.
-    """}]
+def render_chat_history(messages):
+    """Build a single markdown block for the given chat messages
+    
+    Rendered messages are kept in st.session_state.chat_markdown, which grows
+    alongside st.session_state.messages, so each message is formatted once.
+    
+    Args:
+        messages (list): Trailing slice of st.session_state.messages to render
         
-    # Initialize autonomous features if configured
-    if 'autonomous_enabled' not in st.session_state:
-        st.session_state.autonomous_enabled = os.getenv("AUTONOMOUS_ENABLED", "false").lower() == "true"
+    Returns:
+        str: Markdown for the messages
+    """
+    rendered = st.session_state.chat_markdown
+    for message in st.session_state.messages[len(rendered):]:
+        speaker = "🧑 **You**" if message['role'] == 'user' else "🤖 **Assistant**"
+        rendered.append(f"{speaker}\n\n{textwrap.dedent(message['content']).strip()}")
+    
+    return "\n\n---\n\n".join(rendered[len(rendered) - len(messages):])
 
-    # Auto-initialize connections if enabled
-    if os.getenv("AUTO_INITIALIZE", "false").lower() == "true":
-        # Auto-init WatsonX model
-        if os.getenv("WATSONX_API_KEY") and 'pdf_agent' not in st.session_state:
-            with st.spinner("Auto-initializing WatsonX model..."):
-                try:
-                    my_credentials = {
-                        "url": os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com"),
-                        "apikey": os.getenv("WATSONX_API_KEY")
-                    }
-                    model_name = os.getenv("WATSONX_MODEL", "meta-llama/llama-3-3-70b-instruct")
-                    params = json.loads(os.getenv("WATSONX_MODEL_PARAMS", 
-                                              '{"decoding_method":"sample", "max_new_tokens":500, "temperature":0.5}'))
-                    project_id = os.getenv("WATSONX_PROJECT_ID", "ea1bfd72-28d6-4a4d-8668-c1de89865515")
-                    space_id = None
-                    verify = False
-                    
-                    model = Model(model_name, my_credentials, params, project_id, space_id, verify)
-                    
-                    # Initialize MS Graph client if available
-                    ms_graph_client = None
-                    if (os.getenv("MS_CLIENT_ID") and os.getenv("MS_CLIENT_SECRET") and 
-                        os.getenv("MS_TENANT_ID") and os.getenv("MS_USER_EMAIL")):
-                        try:
-                            ms_client_id = os.getenv("MS_CLIENT_ID")
-                            ms_client_secret = os.getenv("MS_CLIENT_SECRET") 
-                            ms_tenant_id = os.getenv("MS_TENANT_ID")
-                            ms_user_email = os.getenv("MS_USER_EMAIL")
-                            
-                            ms_graph_client = MSGraphClient(
-                                ms_client_id, ms_client_secret, ms_tenant_id, ms_user_email
-                            )
-                            
-                            if ms_graph_client.get_token():
-                                st.session_state.ms_graph_client = ms_graph_client
-                                st.success("Auto-connected to Microsoft Graph API successfully")
-                            else:
-                                st.warning("Failed to auto-connect to Microsoft Graph API")
-                                ms_graph_client = None
-                        except Exception as e:
-                            st.warning(f"Error auto-initializing Microsoft Graph client: {str(e)}")
-                            ms_graph_client = None
-                    
-                    # Initialize PDF agent with MS Graph client
-                    st.session_state.pdf_agent = WatsonxPDFAgent(
-                        model, 
-                        pdf_search_tool=None,
-                        ms_graph_client=ms_graph_client
-                    )
+def run_classification():
+    """Classify the current document and report the result in the chat
+    
+    Shared by the Classify button and the "classify" chat command.
+    
+    Returns:
+        dict: Classification result from classify_and_organize_document
+    """
+    with st.spinner("Classifying document..."):
+        # Organize the document in its bucket if it came from S3
+        result = classify_and_organize_document(
+            st.session_state.pdf_path,
+            bucket_name=st.session_state.get('selected_bucket'),
+            original_key=st.session_state.current_s3_key
+        )
+    
+    if result.get("success", False):
+        # Check if it's a custom category
+        if result.get("is_custom_category", False) and result.get("custom_category"):
+            category_display = result.get("custom_category")
+        else:
+            category_display = result['category']
+            
+        response = f"✅ I've classified this document as **{category_display}**."
+        if "target_key" in result:
+            response += f" It has been organized into the **{result['folder']}** folder in your S3 bucket."
+            # If it's a custom category, add a note about folder creation
+            if result.get("is_custom_category", False):
+                response += f"\n\n*Note: I've created a new folder for this category since it didn't match any of the standard categories.*"
+        response += f"\n\nConfidence: {result['confidence']:.2f}\n\n**Reasoning**: {result['reasoning']}"
+    else:
+        error_msg = result.get("error", "Unknown error during classification")
+        response = f"❌ I couldn't classify this document: {error_msg}"
+    
+    st.chat_message('assistant').markdown(response)
+    st.session_state.messages.append({'role': 'assistant', 'content': response})
+    return result
 
-                    # Initialize the document classifier
-                    st.session_state.document_classifier = DocumentClassifier(
-                        model,  # This is the WatsonX model instance
-                        pdf_search_tool=None
-                    )
-                    logger.info("Document classifier auto-initialized")
-                    st.success("WatsonX model auto-initialized successfully")
-                except Exception as e:
-                    st.error(f"Error auto-initializing WatsonX model: {str(e)}")
-                    logger.error(f"Error auto-initializing WatsonX model: {str(e)}")
-        
-        # Auto-init AWS S3 client
-        if os.getenv("AWS_ACCESS_KEY_ID") and os.getenv("AWS_SECRET_ACCESS_KEY") and 'aws_s3_client' not in st.session_state:
-            with st.spinner("Auto-connecting to AWS S3..."):
-                try:
-                    aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-                    aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-                    aws_region = os.getenv("AWS_REGION", "us-east-1")
-                    
-                    s3_client = AWSS3Client(aws_access_key, aws_secret_key, aws_region)
-                    
-                    if s3_client.connect():
-                        st.session_state.aws_s3_client = s3_client
-                        
-                        # Get available buckets
-                        buckets = s3_client.list_buckets()
-                        if buckets:
-                            st.session_state.aws_buckets = buckets
-                            st.success(f"Auto-connected to AWS S3: Found {len(buckets)} buckets")
-                        else:
-                            st.warning("No buckets found")
-                    else:
-                        st.error("Failed to auto-connect to AWS S3")
-                except Exception as e:
-                    st.error(f"Error auto-connecting to AWS S3: {str(e)}")
-                    logger.error(f"Error auto-connecting to AWS S3: {str(e)}")
+def run_chat_action(prompt, action):
+    """Run an action button as one chat turn, then rerun the Chat tab fragment
+    
+    The user prompt and the action's response are rendered together in a single
+    container; the fragment rerun then folds both into the chat history block.
+    
+    Args:
+        prompt (str): Prompt shown as the user's message
+        action (callable): Renders the assistant response and adds it to the chat history
+    """
+    st.session_state.messages.append({'role': 'user', 'content': prompt})
+    with st.container():
+        st.chat_message('user').markdown(prompt)
+        action()
+    st.rerun(scope="fragment")
+
+@st.fragment(run_every="2s")
+def report_pending_emails():
+    """Poll emails queued by the PDF agent and toast each result once it completes"""
+    still_pending = []
+    for to_email, future in st.session_state.pending_emails:
+        if not future.done():
+            still_pending.append((to_email, future))
+            continue
         
-        # Auto-init Microsoft Graph client separately handled with the WatsonX model initialization above
+        try:
+            if future.result():
+                st.toast(f"✅ Email sent successfully to {to_email}")
+            else:
+                st.toast(f"❌ Failed to send email to {to_email}")
+        except Exception as e:
+            logger.error(f"Error sending email to {to_email}: {str(e)}")
+            st.toast(f"❌ Error sending email to {to_email}: {str(e)}")
+    
+    st.session_state.pending_emails = still_pending
 
-    # Main layout with tabs
-    tab1, tab2 = st.tabs(["Chat", "Configuration"])
+@st.fragment
+def render_chat_tab():
+    """Render the Chat tab
+    
+    Runs as a fragment so chat interactions only rerun this tab. Action buttons
+    rerun just this fragment afterwards so their inline messages are folded
+    into the chat history.
+    """
+    # Document info section - show when document is loaded
+    if st.session_state.pdf_path:
+        file_name = st.session_state.pdf_file_name
+        
+        # Show document info bar at full width
+        st.info(f"📄 Current document: {file_name}")
+        
+        # Create a row of three equally sized buttons below the info bar
+        action_col1, action_col2, action_col3 = st.columns(3)
+        
+        with action_col1:
+            summarize_clicked = st.button("📝 Summarize", use_container_width=True)
+        with action_col2:
+            recommend_clicked = st.button("🧠 Recommend", use_container_width=True)
+        with action_col3:
+            classify_clicked = st.button("🏷️ Classify", use_container_width=True)
+        
+        # Render the clicked action's turn below the buttons at full width
+        if summarize_clicked and st.session_state.pdf_agent:
+            prompt = "Summarize this document"
+            run_chat_action(prompt, partial(run_document_action, prompt, "document_summary"))
+        elif recommend_clicked and st.session_state.pdf_agent:
+            prompt = "What are your recommendations based on this document?"
+            run_chat_action(prompt, partial(run_document_action, prompt, "document_recommendations"))
+        elif classify_clicked:
+            run_chat_action("Classify this document", run_classification)
+        
+        # Get document metadata once the document has been processed
+        if st.session_state.pdf_agent and st.session_state.pdf_processed:
+            with st.expander("Document Details"):
+                # Format the details once per document; reruns reuse the markdown
+                if st.session_state.pdf_details is None:
+                    st.session_state.pdf_details = format_document_details(get_cached_document_metadata(
+                        st.session_state.pdf_hash,
+                        st.session_state.pdf_agent,
+                        st.session_state.pdf_path
+                    ))
+                
+                if st.session_state.pdf_details:
+                    st.markdown(st.session_state.pdf_details)
+    
+    # Helper text for email and reminder features
+    if st.session_state.pdf_path and st.session_state.ms_graph_client and st.session_state.pdf_agent:
+        with st.expander("💡 Chat Commands"):
+            st.markdown(CHAT_COMMANDS_MARKDOWN)
+    
+    # Display chat messages, rendering only the most recent ones for long chats
+    messages = st.session_state.messages
+    hidden_count = len(messages) - get_env_config().chat_history_window
+    if hidden_count > 0 and not st.session_state.show_full_chat_history:
+        if st.button(f"Show {hidden_count} earlier messages"):
+            st.session_state.show_full_chat_history = True
+        else:
+            messages = messages[hidden_count:]
+    
+    # Render the history as one markdown block instead of one chat widget per message
+    with st.container():
+        st.markdown(render_chat_history(messages))
+    
+    # Chat input
+    if st.session_state.pdf_path and st.session_state.pdf_agent:
+        chat_placeholder = CHAT_PLACEHOLDER_READY
+    else:
+        chat_placeholder = CHAT_PLACEHOLDER_EMPTY
+        
+    prompt = st.chat_input(chat_placeholder, disabled=not st.session_state.pdf_path)
+    pending_email_count = len(st.session_state.pending_emails)
+    
+    if prompt:
+        # Display user message
+        st.chat_message('user').markdown(prompt)
+        st.session_state.messages.append({'role': 'user', 'content': prompt})
+        
+        if "classify" in prompt.lower():
+            # User wants to classify the document; skip the general answer
+            run_classification()
+        elif not ensure_pdf_processed():
+            # Process the document on the first question; report a failure once
+            # instead of querying the agent without a search tool
+            st.chat_message('assistant').markdown(PDF_NOT_PROCESSED_MESSAGE)
+            st.session_state.messages.append({'role': 'assistant', 'content': PDF_NOT_PROCESSED_MESSAGE})
+        else:
+            # Stream the PDF agent's response into the chat as it is generated
+            with st.chat_message('assistant'):
+                response, _ = stream_agent_response(prompt)
+            st.session_state.messages.append({'role': 'assistant', 'content': response})
+    
+    # Rerun the app so report_pending_emails starts polling a newly queued email
+    if len(st.session_state.pending_emails) > pending_email_count:
+        st.rerun()
 
-    try:
-        add_autonomous_features(tab1, tab2)
-    except Exception as e:
-        logger.error(f"Error initializing autonomous features: {str(e)}")
-        st.error("There was an error setting up autonomous features. You can still use the basic functionality.")
+@st.fragment
+def render_config_tab():
+    """Render the Configuration tab
     
-    # Tab 1: Chat
-    with tab1:
-        # Document info section - show when document is loaded
-        if st.session_state.pdf_path:
-            file_name = os.path.basename(st.session_state.pdf_path)
-            
-            # Show document info bar at full width
-            st.info(f"📄 Current document: {file_name}")
-            
-            # Create a row of three equally sized buttons below the info bar
-            action_col1, action_col2, action_col3 = st.columns(3)
+    Runs as a fragment so editing settings and browsing S3 folders only rerun
+    this tab. Loading a document calls st.rerun(), which refreshes the whole app
+    including the Chat tab.
+    """
+    env = get_env_config()
+    
+    st.header("Configuration")
+    
+    # WatsonX Configuration
+    st.subheader("WatsonX Configuration")
+    watsonx_api_key = st.text_input("WatsonX API Key", key="watsonx_api_key", 
+                                value=env.watsonx_api_key, type="password")
+    watsonx_url = st.text_input("WatsonX URL", key="watsonx_url", 
+                            value=env.watsonx_url, 
+                            type="default")   
+    watsonx_model = st.selectbox(
+        "Model", 
+        ["meta-llama/llama-3-3-70b-instruct", "ibm/granite-20b-instruct-v2", "meta-llama/llama-2-70b-chat"],
+        key="watsonx_model"
+    )
+    watsonx_model_params = st.text_area(
+        "Model Parameters", 
+        value=env.watsonx_model_params, 
+        key="watsonx_model_params"
+    )
+
+    # Optional round-trip to the model after initialization; off by default since
+    # it costs a full generation call
+    run_smoke_test = st.checkbox("Run smoke test", value=False, key="watsonx_smoke_test")
+
+    # Initialize/Configure WatsonX model
+    model_initialized = False
+    if st.button("Initialize WatsonX Model"):
+        try:
+            # Validate edited parameters before creating the model
+            parse_model_params(watsonx_model_params)
             
-            with action_col1:
-                if st.button("📝 Summarize", use_container_width=True):
-                    # Add message to chat asking for summary
-                    prompt = "Summarize this document"
-                    st.chat_message('user').markdown(prompt)
-                    st.session_state.messages.append({'role': 'user', 'content': prompt})
-                    
-                    # Process with PDF agent
-                    if st.session_state.pdf_agent:
-                        with st.spinner("Generating summary..."):
-                            response = st.session_state.pdf_agent.process_document(st.session_state.pdf_path, prompt)
-                        
-                        # Display response
-                        st.chat_message('assistant').markdown(response)
-                        st.session_state.messages.append({'role': 'assistant', 'content': response})
-                        st.rerun()
+            model = get_watsonx_model(
+                watsonx_url,
+                watsonx_api_key,
+                watsonx_model,
+                watsonx_model_params,
+                env.watsonx_project_id
+            )
             
-            with action_col2:
-                if st.button("🧠 Recommend", use_container_width=True):
-                    # Add message to chat asking for recommendations
-                    prompt = "What are your recommendations based on this document?"
-                    st.chat_message('user').markdown(prompt)
-                    st.session_state.messages.append({'role': 'user', 'content': prompt})
-                    
-                    # Process with PDF agent
-                    if st.session_state.pdf_agent:
-                        with st.spinner("Generating recommendations..."):
-                            response = st.session_state.pdf_agent.process_document(st.session_state.pdf_path, prompt)
-                        
-                        # Display response
-                        st.chat_message('assistant').markdown(response)
-                        st.session_state.messages.append({'role': 'assistant', 'content': response})
-                        st.rerun()
+            # Initialize PDF agent with model and any existing MS Graph client
+            ms_graph_client = st.session_state.ms_graph_client
             
-            with action_col3:
-                if st.button("🏷️ Classify", use_container_width=True):
-                    # Show a spinner while classifying
-                    with st.spinner("Classifying document..."):
-                        # Get current bucket if document came from S3
-                        current_bucket = st.session_state.get('selected_bucket', None)
-                        original_key = None
-                        
-                        # Check if we have the original key stored
-                        if hasattr(st.session_state, 'current_s3_key') and st.session_state.current_s3_key:
-                            original_key = st.session_state.current_s3_key
-                        
-                        # Classify the document
-                        result = classify_and_organize_document(
-                            st.session_state.pdf_path,
-                            bucket_name=current_bucket,
-                            original_key=original_key
-                        )
-                        
-                        # Add a message to chat with the classification result
-                        if result.get("success", False):
-                            prompt = f"This document has been classified as: {result['category']} (Confidence: {result['confidence']:.2f})"
-                            if "target_key" in result:
-                                prompt += f"\nThe document has been organized into the {result['folder']} folder."
-                            prompt += f"\n\nReasoning: {result['reasoning']}"
-                            
-                            st.chat_message('user').markdown(prompt)
-                            st.session_state.messages.append({'role': 'user', 'content': prompt})
-                            
-                            # Have the assistant acknowledge
-                            response = f"✅ I've classified this document as **{result['category']}**."
-                            if "target_key" in result:
-                                response += f" It has been organized into the **{result['folder']}** folder in your S3 bucket."
-                            response += f"\n\nConfidence: {result['confidence']:.2f}\n\n**Reasoning**: {result['reasoning']}"
-                            
-                            st.chat_message('assistant').markdown(response)
-                            st.session_state.messages.append({'role': 'assistant', 'content': response})
-                            st.rerun()
-                        else:
-                            # Handle error
-                            error_msg = result.get("error", "Unknown error during classification")
-                            st.error(f"Classification failed: {error_msg}")
-                            
-                            # Add error to chat
-                            response = f"❌ I couldn't classify this document: {error_msg}"
-                            st.chat_message('assistant').markdown(response)
-                            st.session_state.messages.append({'role': 'assistant', 'content': response})
-                            st.rerun()
+            # Get any existing PDF search tool
+            pdf_search_tool = st.session_state.pdf_search_tool
             
-            # Get document metadata if we have a PDF agent
-            if st.session_state.pdf_agent:
-                with st.expander("Document Details"):
-                    metadata = st.session_state.pdf_agent.get_document_metadata(st.session_state.pdf_path)
-                    
-                    if "error" not in metadata:
-                        st.write(f"**Title:** {metadata.get('title', 'Unknown')}")
-                        st.write(f"**Author:** {metadata.get('author', 'Unknown')}")
-                        st.write(f"**Date:** {metadata.get('date', 'Unknown')}")
-                        st.write(f"**Size:** {metadata.get('file_size', 0) / 1024:.1f} KB")
-                        
-                        if "topics" in metadata and metadata["topics"]:
-                            st.write("**Main Topics:**")
-                            for topic in metadata["topics"]:
-                                st.write(f"- {topic}")
-        
-        # Helper text for email and reminder features
-        if st.session_state.pdf_path and st.session_state.ms_graph_client and st.session_state.pdf_agent:
-            with st.expander("💡 Chat Commands"):
-                st.markdown("""
-                You can use these commands in the chat:
-                - **Send email to: [email]** - Send an email with a summary of this document
-                - **Remind me in [X] days/weeks** - Set a reminder to review this document later
-                - **Summarize** - Get a comprehensive summary
-                - **Recommend** or **Next steps** - Get recommendations based on the document
-                """)
-        
-        # Display chat messages
-        for message in st.session_state.messages:
-            st.chat_message(message['role']).markdown(message['content'])
-        
-        # Chat input
-        if st.session_state.pdf_path and st.session_state.pdf_agent:
-            chat_placeholder = "Ask a question, request a summary, or type 'send email to: someone@example.com'"
-        else:
-            chat_placeholder = "Please upload or select a document first"
+            from pdf_agent import WatsonxPDFAgent
             
-        prompt = st.chat_input(chat_placeholder, disabled=not st.session_state.pdf_path)
-        
-        if prompt:
-            # Display user message
-            st.chat_message('user').markdown(prompt)
-            st.session_state.messages.append({'role': 'user', 'content': prompt})
+            st.session_state.pdf_agent = WatsonxPDFAgent(
+                model, 
+                pdf_search_tool=pdf_search_tool,
+                ms_graph_client=ms_graph_client
+            )
             
-            # Process the query with the PDF agent
-            with st.spinner("Processing your request..."):
-                response = st.session_state.pdf_agent.process_document(st.session_state.pdf_path, prompt)
+            # Initialize the document classifier
+            st.session_state.document_classifier = DocumentClassifier(
+                model,  # This is the WatsonX model instance
+                pdf_search_tool=pdf_search_tool
+            )
+            logger.info("Document classifier initialized")
+            model_initialized = True
             
-            # Display AI response
-            st.chat_message('assistant').markdown(response)
-            st.session_state.messages.append({'role': 'assistant', 'content': response})
-
-        if prompt and "classify" in prompt.lower():
-            # User wants to classify the document
-            with st.spinner("Classifying document..."):
-                # Get current bucket if document came from S3
-                current_bucket = st.session_state.get('selected_bucket', None)
-                original_key = None
-                
-                # Check if we have the original key stored
-                if hasattr(st.session_state, 'current_s3_key') and st.session_state.current_s3_key:
-                    original_key = st.session_state.current_s3_key
-                
-                # Classify the document
-                result = classify_and_organize_document(
-                    st.session_state.pdf_path,
-                    bucket_name=current_bucket,
-                    original_key=original_key
-                )
-                
-                # Prepare response based on result
-                if result.get("success", False):
-                    # Check if it's a custom category
-                    if result.get("is_custom_category", False) and result.get("custom_category"):
-                        category_display = result.get("custom_category")
-                    else:
-                        category_display = result['category']
-                        
-                    response = f"✅ I've classified this document as **{category_display}**."
-                    if "target_key" in result:
-                        response += f" It has been organized into the **{result['folder']}** folder in your S3 bucket."
-                        # If it's a custom category, add a note about folder creation
-                        if result.get("is_custom_category", False):
-                            response += f"\n\n*Note: I've created a new folder for this category since it didn't match any of the standard categories.*"
-                    response += f"\n\nConfidence: {result['confidence']:.2f}\n\n**Reasoning**: {result['reasoning']}"
-                else:
-                    error_msg = result.get("error", "Unknown error during classification")
-                    response = f"❌ I couldn't classify this document: {error_msg}"
-                
-                # Display AI response
-                st.chat_message('assistant').markdown(response)
-                st.session_state.messages.append({'role': 'assistant', 'content': response})    
+            if run_smoke_test:
+                with st.spinner("Testing WatsonX model..."):
+                    try:
+                        test_response = model.generate_text("Hello, please confirm if you're working correctly.")
+                    except Exception as e:
+                        test_response = f"Smoke test failed: {str(e)}"
+                        logger.error(f"WatsonX smoke test failed: {str(e)}")
+                st.session_state.watsonx_smoke_test_response = test_response
+        except json.JSONDecodeError as e:
+            st.error(f"Model parameters must be valid JSON: {str(e)}")
+        except Exception as e:
+            st.error(f"Error initializing WatsonX model: {str(e)}")
+            logger.error(f"Error initializing WatsonX model: {str(e)}")
     
-    # Tab 2: Configuration
-    with tab2:
-        st.header("Configuration")
+    # This tab is a fragment; rerun the whole app so the Chat tab and the
+    # autonomous agent section pick up the new model, as Load PDF does
+    if model_initialized:
+        st.session_state.watsonx_initialized_notice = True
+        st.rerun()
+    
+    # Confirm the initialization after that rerun
+    if st.session_state.pop("watsonx_initialized_notice", False):
+        st.success("WatsonX model initialized successfully!")
+        smoke_test_response = st.session_state.pop("watsonx_smoke_test_response", None)
+        if smoke_test_response is not None:
+            st.info(f"Model response: {smoke_test_response}")
+    
+    # Main configuration columns
+    col1, col2 = st.columns(2)
+    
+    # AWS S3 Configuration Column
+    with col1:
+        st.subheader("AWS S3 Configuration")
+        aws_access_key = st.text_input("AWS Access Key", key="aws_access_key", 
+                                    value=env.aws_access_key_id)
+        aws_secret_key = st.text_input("AWS Secret Key", key="aws_secret_key", 
+                                    value=env.aws_secret_access_key, 
+                                    type="password")
+        aws_region = st.text_input("AWS Region", key="aws_region", 
+                                value=env.aws_region)
         
-        # WatsonX Configuration
-        st.subheader("WatsonX Configuration")
-        watsonx_api_key = st.text_input("WatsonX API Key", key="watsonx_api_key", 
-                                    value=os.getenv("WATSONX_API_KEY", ""), type="password")
-        watsonx_url = st.text_input("WatsonX URL", key="watsonx_url", 
-                                value=os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com"), 
-                                type="default")   
-        watsonx_model = st.selectbox(
-            "Model", 
-            ["meta-llama/llama-3-3-70b-instruct", "ibm/granite-20b-instruct-v2", "meta-llama/llama-2-70b-chat"],
-            key="watsonx_model"
-        )
-        watsonx_model_params = st.text_area(
-            "Model Parameters", 
-            value=os.getenv("WATSONX_MODEL_PARAMS", '{"decoding_method":"sample", "max_new_tokens":500, "temperature":0.5}'), 
-            key="watsonx_model_params"
-        )
-
-        # Initialize/Configure WatsonX model
-        if st.button("Initialize WatsonX Model"):
+        if st.button("Connect to AWS S3"):
             try:
-                my_credentials = {
-                    "url": watsonx_url,
-                    "apikey": watsonx_api_key
-                }
-                
-                # Parse model parameters
-                params = json.loads(watsonx_model_params)
-                project_id = os.getenv("WATSONX_PROJECT_ID", "ea1bfd72-28d6-4a4d-8668-c1de89865515")
-                space_id = None
-                verify = False
-                
-                model = Model(watsonx_model, my_credentials, params, project_id, space_id, verify)
-                
-                # Initialize PDF agent with model and any existing MS Graph client
-                ms_graph_client = st.session_state.ms_graph_client if 'ms_graph_client' in st.session_state else None
-                
-                # Get any existing PDF search tool
-                pdf_search_tool = st.session_state.pdf_search_tool if 'pdf_search_tool' in st.session_state else None
-                
-                st.session_state.pdf_agent = WatsonxPDFAgent(
-                    model, 
-                    pdf_search_tool=pdf_search_tool,
-                    ms_graph_client=ms_graph_client
-                )
-                
-                # Initialize the document classifier
-                st.session_state.document_classifier = DocumentClassifier(
-                    model,  # This is the WatsonX model instance
-                    pdf_search_tool=pdf_search_tool
+                default_bucket = env.s3_bucket_name
+                st.session_state.aws_s3_client = get_s3_client(
+                    aws_access_key,
+                    aws_secret_key,
+                    aws_region,
+                    default_bucket
                 )
-                logger.info("Document classifier initialized")
+                st.success("Connected to AWS S3 successfully!")
                 
-                st.success("WatsonX model initialized successfully!")
+                # Get available buckets (only the configured one if S3_BUCKET_NAME is set)
+                if default_bucket:
+                    buckets = [default_bucket]
+                else:
+                    buckets = list_s3_buckets(
+                        get_s3_credentials_hash(st.session_state.aws_s3_client),
+                        st.session_state.aws_s3_client
+                    )
+                if buckets:
+                    st.session_state.aws_buckets = buckets
+                    st.success(f"Found {len(buckets)} buckets")
+                else:
+                    st.warning("No buckets found")
+            except ConnectionError:
+                st.error("Failed to connect to AWS S3")
             except Exception as e:
-                st.error(f"Error initializing WatsonX model: {str(e)}")
-                logger.error(f"Error initializing WatsonX model: {str(e)}")
+                st.error(f"Error connecting to AWS S3: {str(e)}")
         
-        # Main configuration columns
-        col1, col2 = st.columns(2)
-        
-        # AWS S3 Configuration Column
-        with col1:
-            st.subheader("AWS S3 Configuration")
-            aws_access_key = st.text_input("AWS Access Key", key="aws_access_key", 
-                                        value=os.getenv("AWS_ACCESS_KEY_ID", ""))
-            aws_secret_key = st.text_input("AWS Secret Key", key="aws_secret_key", 
-                                        value=os.getenv("AWS_SECRET_ACCESS_KEY", ""), 
-                                        type="password")
-            aws_region = st.text_input("AWS Region", key="aws_region", 
-                                    value=os.getenv("AWS_REGION", "us-east-1"))
-            
-            if st.button("Connect to AWS S3"):
-                try:
-                    st.session_state.aws_s3_client = AWSS3Client(
-                        aws_access_key,
-                        aws_secret_key,
-                        aws_region
-                    )
-                    
-                    if st.session_state.aws_s3_client.connect():
-                        st.success("Connected to AWS S3 successfully!")
-                        
-                        # Get available buckets
-                        buckets = st.session_state.aws_s3_client.list_buckets()
+        # If AWS S3 is connected, show PDF selection options
+        # If AWS S3 is connected, show PDF selection with folder navigation
+        if st.session_state.aws_s3_client:
+            if st.session_state.aws_buckets:
+                selected_bucket = st.selectbox(
+                    "Select S3 Bucket", 
+                    options=st.session_state.aws_buckets,
+                    key="selected_bucket"
+                )
+                
+                # Only the configured bucket is listed up front; fetch the rest on demand
+                if env.s3_bucket_name and len(st.session_state.aws_buckets) == 1:
+                    if st.button("Show All Buckets"):
+                        buckets = list_s3_buckets(
+                            get_s3_credentials_hash(st.session_state.aws_s3_client),
+                            st.session_state.aws_s3_client
+                        )
                         if buckets:
                             st.session_state.aws_buckets = buckets
-                            st.success(f"Found {len(buckets)} buckets")
+                            st.rerun(scope="fragment")
                         else:
                             st.warning("No buckets found")
-                    else:
-                        st.error("Failed to connect to AWS S3")
-                except Exception as e:
-                    st.error(f"Error connecting to AWS S3: {str(e)}")
-            
-            # If AWS S3 is connected, show PDF selection options
-            # If AWS S3 is connected, show PDF selection with folder navigation
-            if 'aws_s3_client' in st.session_state and st.session_state.aws_s3_client:
-                if 'aws_buckets' in st.session_state and st.session_state.aws_buckets:
-                    selected_bucket = st.selectbox(
-                        "Select S3 Bucket", 
-                        options=st.session_state.aws_buckets,
-                        key="selected_bucket"
+                
+                if selected_bucket:
+                    # Show current path and provide a way to go up a level
+                    if st.session_state.current_s3_folder:
+                        # Use a horizontal layout instead of columns to avoid nesting issues
+                        st.write(f"Current folder: /{st.session_state.current_s3_folder}" if st.session_state.current_s3_folder else "Root folder")
+                        
+                        if st.button("⬆️ Go Up"):
+                            # Go up one level; folder paths end with a slash
+                            st.session_state.current_s3_folder = st.session_state.current_s3_folder.rstrip('/').rpartition('/')[0]
+                            st.rerun(scope="fragment")
+                    
+                    # Listings are cached for a few minutes; allow a manual refresh
+                    if st.button("🔄 Refresh"):
+                        list_s3_buckets.clear()
+                        list_s3_items.clear()
+                    
+                    # List files and folders in the current directory
+                    s3_items = list_s3_items(
+                        selected_bucket, 
+                        st.session_state.current_s3_folder,
+                        get_s3_credentials_hash(st.session_state.aws_s3_client),
+                        st.session_state.aws_s3_client
                     )
                     
-                    if selected_bucket:
-                        # Initialize or get the current folder path
-                        if 'current_s3_folder' not in st.session_state:
-                            st.session_state.current_s3_folder = ""
-                        
-                        # Show current path and provide a way to go up a level
-                        if st.session_state.current_s3_folder:
-                            # Use a horizontal layout instead of columns to avoid nesting issues
-                            st.write(f"Current folder: /{st.session_state.current_s3_folder}" if st.session_state.current_s3_folder else "Root folder")
-                            
-                            if st.button("⬆️ Go Up"):
-                                # Go up one level
-                                path_parts = st.session_state.current_s3_folder.split('/')
-                                if len(path_parts) > 1:
-                                    st.session_state.current_s3_folder = '/'.join(path_parts[:-1])
-                                else:
-                                    st.session_state.current_s3_folder = ""
-                                st.rerun()
-                        
-                        # List files and folders in the current directory
-                        s3_items = st.session_state.aws_s3_client.list_pdfs(
-                            selected_bucket, 
-                            prefix=st.session_state.current_s3_folder
+                    if s3_items:
+                        # Select items by index; the icon is only added when an option is displayed
+                        selected_index = st.selectbox(
+                            "Select File or Folder", 
+                            options=range(len(s3_items)),
+                            format_func=lambda i: f"{'📁' if s3_items[i]['type'] == 'folder' else '📄'} {s3_items[i]['name']}",
+                            key="selected_s3_item"
                         )
                         
-                        if s3_items:
-                            # Format the items into a nice display list
-                            item_options = []
-                            item_paths = {}
-                            
-                            for item in s3_items:
-                                display_name = f"📁 {item['name']}" if item['type'] == 'folder' else f"📄 {item['name']}"
-                                item_options.append(display_name)
-                                if 'path' in item:
-                                    item_paths[display_name] = item['path']
-                                else:
-                                    item_paths[display_name] = item['name']
+                        if selected_index is not None and selected_index < len(s3_items):
+                            # Get the name and path of the selected item
+                            item = s3_items[selected_index]
+                            item_name = item['name']
+                            selected_path = item.get('path', item_name)
                             
-                            selected_item = st.selectbox(
-                                "Select File or Folder", 
-                                options=item_options,
-                                key="selected_s3_item"
-                            )
+                            # Check if it's a folder or file
+                            is_folder = item['type'] == 'folder'
                             
-                            if selected_item:
-                                # Get the path of the selected item
-                                selected_path = item_paths[selected_item]
-                                
-                                # Check if it's a folder or file
-                                is_folder = selected_item.startswith("📁")
-                                
-                                # Handle folder navigation
-                                if is_folder:
-                                    if st.button(f"Open Folder: {selected_item[2:]}"):
-                                        st.session_state.current_s3_folder = selected_path
-                                        st.rerun()
-                                # Handle file selection
-                                else:
-                                    if st.button(f"Load PDF: {selected_item[2:]}"):
-                                        with st.spinner("Downloading PDF from S3..."):
-                                            # Get the file path
-                                            if st.session_state.current_s3_folder:
-                                                object_key = f"{st.session_state.current_s3_folder}/{selected_path}"
-                                            else:
-                                                object_key = selected_path
-                                            
-                                            # Store the original key for future reference
-                                            st.session_state.current_s3_key = object_key
-                                            
-                                            # Download the file code...
-                                            # (Keeping the existing download code)
-                                            # Create a temporary directory
-                                            temp_dir = tempfile.mkdtemp()
-                                            local_path = os.path.join(temp_dir, os.path.basename(selected_path))
-                                            
-                                            # Download the file
-                                            try:
-                                                if st.session_state.aws_s3_client.download_file(selected_bucket, object_key, local_path):
-                                                    # Verification and processing code...
-                                                    # (Keeping the existing processing code)
-                                                    # Verify the file exists
-                                                    if not os.path.exists(local_path):
-                                                        st.error(f"File was downloaded but couldn't be found at {local_path}")
-                                                        return
-                                                        
-                                                    # Store the absolute path
-                                                    st.session_state.pdf_path = os.path.abspath(local_path)
-                                                    
-                                                    # Log the path for debugging
-                                                    logger.info(f"PDF downloaded to: {st.session_state.pdf_path}")
-                                                    st.info(f"PDF downloaded to: {st.session_state.pdf_path}")
+                            # Handle folder navigation
+                            if is_folder:
+                                if st.button(f"Open Folder: {item_name}"):
+                                    st.session_state.current_s3_folder = selected_path
+                                    st.rerun(scope="fragment")
+                            # Handle file selection
+                            else:
+                                if st.button(f"Load PDF: {item_name}"):
+                                    with st.spinner("Downloading PDF from S3..."):
+                                        # Listed paths are already full object keys
+                                        object_key = selected_path
+                                        
+                                        # Store the original key for future reference
+                                        st.session_state.current_s3_key = object_key
+                                        
+                                        # Download the file, reusing the cached copy if it hasn't changed in S3
+                                        try:
+                                            # Open it through a session-owned link so cache eviction can't remove the document
+                                            local_path, pdf_hash = download_s3_pdf(
+                                                st.session_state.aws_s3_client,
+                                                selected_bucket,
+                                                object_key,
+                                                link_dir=get_session_tmpdir()
+                                            )
+                                            if local_path:
+                                                # Verification and processing code...
+                                                # (Keeping the existing processing code)
+                                                # Verify the file exists
+                                                if not os.path.exists(local_path):
+                                                    st.error(f"File was downloaded but couldn't be found at {local_path}")
+                                                    return
                                                     
-                                                    # Initialize PDF search tool code...
-                                                    # (Keeping the existing PDF tool initialization code)
-                                                    try:
-                                                        if 'pdf_agent' in st.session_state and st.session_state.pdf_agent:
-                                                            watsonx_model = st.session_state.pdf_agent.model
-                                                            
-                                                            safe_dir = tempfile.mkdtemp(prefix="safe_pdf_")
-                                                            safe_file_path = os.path.join(safe_dir, os.path.basename(selected_path))
-                                                            
-                                                            import shutil
-                                                            shutil.copy2(st.session_state.pdf_path, safe_file_path)
-                                                            
-                                                            logger.info(f"Using safe PDF path: {safe_file_path}")
-                                                            
-                                                            try:
-                                                                st.session_state.pdf_search_tool = get_custom_pdf_tool(
-                                                                    safe_file_path,
-                                                                    watsonx_model
-                                                                )
-                                                                st.success(f"PDF loaded successfully: {os.path.basename(selected_path)}")
-                                                            except Exception as e:
-                                                                st.error(f"Error with PDF tool: {str(e)}")
-                                                                logger.error(f"PDF tool error: {str(e)}")
-                                                            
-                                                            st.session_state.pdf_agent.pdf_search_tool = st.session_state.pdf_search_tool
-                                                            
-                                                            st.session_state.messages.append({
-                                                                "role": "assistant", 
-                                                                "content": f"📄 I've loaded '{os.path.basename(selected_path)}' from S3. What would you like to know about this document?"
-                                                            })
-                                                            
-                                                            st.rerun()
-                                                        else:
-                                                            st.error("Please initialize WatsonX model first before loading PDF")
-                                                    except Exception as e:
-                                                        st.error(f"Error initializing PDF search tool: {str(e)}")
-                                                        logger.error(f"Error initializing PDF search tool: {str(e)}")
-                                                else:
-                                                    st.error(f"Failed to download {selected_path} from S3")
-                                            except Exception as e:
-                                                st.error(f"Error processing PDF: {str(e)}")
-                                                logger.error(f"Error processing PDF: {str(e)}")
-                        else:
-                            st.warning(f"No items found in the current folder")
-        
-        # Microsoft Graph API Configuration Column
-        with col2:
-            st.subheader("Microsoft Graph API Configuration")
-            ms_client_id = st.text_input("Microsoft App Client ID", key="ms_client_id", 
-                                value=os.getenv("MS_CLIENT_ID", ""))
-            ms_client_secret = st.text_input("Microsoft App Client Secret", key="ms_client_secret", 
-                                    value=os.getenv("MS_CLIENT_SECRET", ""), 
-                                    type="password")
-            ms_tenant_id = st.text_input("Microsoft Tenant ID", key="ms_tenant_id", 
-                                value=os.getenv("MS_TENANT_ID", ""))
-            ms_user_email = st.text_input("Microsoft User Email", key="ms_user_email", 
-                                value=os.getenv("MS_USER_EMAIL", ""))
-            
-            # Two buttons side by side without using nested columns
-            ms_graph_col1, ms_graph_col2 = st.columns(2)
-            
-            with ms_graph_col1:
-                if st.button("Configure Microsoft Graph"):
-                    try:
-                        st.session_state.ms_graph_client = MSGraphClient(
-                            ms_client_id,
-                            ms_client_secret,
-                            ms_tenant_id,
-                            ms_user_email
-                        )
+                                                # Make it the current document, replacing the previous one
+                                                set_current_pdf(local_path, pdf_hash=pdf_hash)
+                                                
+                                                # Log the path for debugging
+                                                logger.debug("PDF downloaded to: %s", st.session_state.pdf_path)
+                                                
+                                                # Initialize PDF search tool code...
+                                                # (Keeping the existing PDF tool initialization code)
+                                                try:
+                                                    if st.session_state.pdf_agent:
+                                                        # Parse the PDF in the background while the user reads the chat
+                                                        start_pdf_processing()
+                                                        st.success(f"PDF loaded successfully: {os.path.basename(selected_path)}")
+                                                        
+                                                        st.session_state.messages.append({
+                                                            "role": "assistant", 
+                                                            "content": f"📄 I've loaded '{os.path.basename(selected_path)}' from S3. What would you like to know about this document?"
+                                                        })
+                                                        
+                                                        st.rerun()
+                                                    else:
+                                                        st.error("Please initialize WatsonX model first before loading PDF")
+                                                except Exception as e:
+                                                    st.error(f"Error initializing PDF search tool: {str(e)}")
+                                                    logger.error(f"Error initializing PDF search tool: {str(e)}")
+                                            else:
+                                                st.error(f"Failed to download {selected_path} from S3")
+                                        except Exception as e:
+                                            st.error(f"Error processing PDF: {str(e)}")
+                                            logger.error(f"Error processing PDF: {str(e)}")
                         
-                        if st.session_state.ms_graph_client.get_token():
-                            st.success("Connected to Microsoft Graph API successfully!")
-                            
-                            if 'pdf_agent' in st.session_state and st.session_state.pdf_agent:
-                                st.session_state.pdf_agent.ms_graph_client = st.session_state.ms_graph_client
-                                st.success("PDF agent updated with email capabilities!")
-                        else:
-                            st.error("Failed to connect to Microsoft Graph API")
-                    except Exception as e:
-                        st.error(f"Error connecting to Microsoft Graph API: {str(e)}")
-            
-            with ms_graph_col2:
-                if st.button("Reset Configuration"):
-                    if 'ms_graph_client' in st.session_state:
-                        del st.session_state.ms_graph_client
-                    
-                    dotenv.load_dotenv(override=True)
-                    
-                    st.success("Configuration reset successfully")
-                    st.rerun()
+                        # Fetch the folder's PDFs in one go so loading each of them is instant
+                        pdf_keys = [item['path'] for item in s3_items if item['type'] == 'file']
+                        if pdf_keys and st.button(f"⬇️ Download All PDFs ({min(len(pdf_keys), S3_PREFETCH_LIMIT)})"):
+                            if len(pdf_keys) > S3_PREFETCH_LIMIT:
+                                st.info(f"Downloading the first {S3_PREFETCH_LIMIT} of {len(pdf_keys)} PDFs")
+                            with st.spinner("Downloading PDFs from S3..."):
+                                failed = prefetch_s3_pdfs(
+                                    st.session_state.aws_s3_client,
+                                    selected_bucket,
+                                    pdf_keys[:S3_PREFETCH_LIMIT]
+                                )
+                            if failed:
+                                st.error(f"Failed to download: {', '.join(failed)}")
+                            else:
+                                st.success("PDFs downloaded; loading them will use the local copies")
+                    else:
+                        st.warning(f"No items found in the current folder")
+    
+    # Microsoft Graph API Configuration Column
+    with col2:
+        st.subheader("Microsoft Graph API Configuration")
+        ms_client_id = st.text_input("Microsoft App Client ID", key="ms_client_id", 
+                            value=env.ms_client_id)
+        ms_client_secret = st.text_input("Microsoft App Client Secret", key="ms_client_secret", 
+                                value=env.ms_client_secret, 
+                                type="password")
+        ms_tenant_id = st.text_input("Microsoft Tenant ID", key="ms_tenant_id", 
+                            value=env.ms_tenant_id)
+        ms_user_email = st.text_input("Microsoft User Email", key="ms_user_email", 
+                            value=env.ms_user_email)
         
-        # Upload PDF directly section - outside the columns to avoid nesting issues
-        st.subheader("Upload PDF")
-        uploaded_file = st.file_uploader("Choose a PDF file", type="pdf")
+        # Two buttons side by side without using nested columns
+        ms_graph_col1, ms_graph_col2 = st.columns(2)
         
-        if uploaded_file:
-            with st.spinner("Processing uploaded PDF..."):
-                # Create a temporary file
-                temp_dir = tempfile.mkdtemp()
-                temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-                
-                # Write the uploaded file to the temp file
-                with open(temp_file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                # Verify the file exists and get absolute path
-                if not os.path.exists(temp_file_path):
-                    st.error(f"Error: File was written but couldn't be found at {temp_file_path}")
-                    return
-                    
-                # Save the absolute file path to session state
-                st.session_state.pdf_path = os.path.abspath(temp_file_path)
-                
-                # Log the path for debugging
-                logger.info(f"PDF uploaded to: {st.session_state.pdf_path}")
-                st.info(f"PDF saved to: {st.session_state.pdf_path}")
-                
-                # PDF agent initialization after upload
-                # (Keeping the existing initialization code)
+        with ms_graph_col1:
+            if st.button("Configure Microsoft Graph"):
                 try:
-                    if 'pdf_agent' in st.session_state and st.session_state.pdf_agent:
-                        watsonx_model = st.session_state.pdf_agent.model
-                        
-                        safe_dir = tempfile.mkdtemp(prefix="safe_pdf_")
-                        safe_file_path = os.path.join(safe_dir, uploaded_file.name)
-                        
-                        import shutil
-                        shutil.copy2(st.session_state.pdf_path, safe_file_path)
-                        
-                        logger.info(f"Using safe PDF path: {safe_file_path}")
-                        
-                        try:
-                            st.session_state.pdf_search_tool = get_custom_pdf_tool(
-                                safe_file_path,
-                                watsonx_model
-                            )
-                            
-                            st.session_state.pdf_agent.pdf_search_tool = st.session_state.pdf_search_tool
-                            
-                            st.session_state.messages.append({
-                                "role": "assistant", 
-                                "content": f"📄 I've loaded '{uploaded_file.name}'. What would you like to know about this document?"
-                            })
-                            
-                            st.success(f"PDF uploaded successfully: {uploaded_file.name}")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Error with PDF tool: {str(e)}")
-                            logger.error(f"PDF tool error: {str(e)}")
-                    else:
-                        st.warning("Please initialize WatsonX model first")
+                    st.session_state.ms_graph_client = get_ms_graph_client(
+                        ms_client_id,
+                        ms_client_secret,
+                        ms_tenant_id,
+                        ms_user_email
+                    )
+                    st.success("Connected to Microsoft Graph API successfully!")
+                    
+                    if st.session_state.pdf_agent:
+                        st.session_state.pdf_agent.ms_graph_client = st.session_state.ms_graph_client
+                        st.success("PDF agent updated with email capabilities!")
+                except ConnectionError:
+                    st.error("Failed to connect to Microsoft Graph API")
                 except Exception as e:
-                    st.error(f"Error initializing PDF search tool: {str(e)}")
-                    logger.error(f"Error initializing PDF search tool: {str(e)}")
+                    st.error(f"Error connecting to Microsoft Graph API: {str(e)}")
         
-        # Save configuration to .env
-        st.subheader("Save Configuration")
-        if st.button("Save Configuration to .env"):
-            try:
-                # Create the .env file content
-                env_content = f"""# WatsonX Configuration
+        with ms_graph_col2:
+            if st.button("Reset Configuration"):
+                st.session_state.ms_graph_client = None
+                get_ms_graph_client.clear()
+                
+                dotenv.load_dotenv(override=True)
+                get_env_config.clear()
+                
+                st.success("Configuration reset successfully")
+                st.rerun()
+    
+    # Upload PDF directly section - outside the columns to avoid nesting issues
+    st.subheader("Upload PDF")
+    uploaded_file = st.file_uploader("Choose a PDF file", type="pdf")
+    
+    # Re-uploading the current document doesn't need to be saved or parsed again
+    if uploaded_file and uploaded_file.file_id != st.session_state.uploaded_file_id:
+        # Hash the in-memory upload with the same algorithm as compute_file_hash
+        upload_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        if (upload_hash == st.session_state.pdf_hash
+                and os.path.basename(uploaded_file.name) == st.session_state.pdf_file_name
+                and os.path.exists(st.session_state.pdf_path)):
+            st.session_state.uploaded_file_id = uploaded_file.file_id
+            st.info(f"{uploaded_file.name} is already loaded")
+    
+    # Only handle a file once; the uploader keeps returning it on every rerun
+    if uploaded_file and uploaded_file.file_id != st.session_state.uploaded_file_id:
+        with st.spinner("Saving uploaded PDF..."):
+            # Save into the session's temporary directory
+            temp_file_path = os.path.join(get_session_tmpdir(), os.path.basename(uploaded_file.name))
+            
+            # Write the upload straight from its in-memory buffer in one call;
+            # copying through read() would allocate a new bytes object per chunk.
+            # A new file is renamed into place because the existing path may be a
+            # hardlink into the S3 download cache, which must not be overwritten.
+            part_path = f"{temp_file_path}.part"
+            with open(part_path, "wb") as f:
+                # Reserve the full size up front so large PDFs are written into one extent
+                if uploaded_file.size >= 1024 * 1024 and hasattr(os, "posix_fallocate"):
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, uploaded_file.size)
+                    except OSError:
+                        pass
+                f.write(uploaded_file.getbuffer())
+            os.replace(part_path, temp_file_path)
+            
+            # Make it the current document, replacing the previous one
+            set_current_pdf(temp_file_path, pdf_hash=upload_hash)
+            st.session_state.uploaded_file_id = uploaded_file.file_id
+            
+            # Parse the PDF in the background; the first query waits for it if needed
+            start_pdf_processing()
+            
+            # Log the path for debugging
+            logger.debug("PDF uploaded to: %s", st.session_state.pdf_path)
+            
+        if st.session_state.pdf_agent:
+            st.session_state.messages.append({
+                "role": "assistant", 
+                "content": f"📄 I've loaded '{uploaded_file.name}'. What would you like to know about this document?"
+            })
+            
+            st.success(f"PDF uploaded successfully: {uploaded_file.name}")
+            st.rerun()
+        else:
+            st.warning("Please initialize WatsonX model first")
+    
+    # Save configuration to .env
+    st.subheader("Save Configuration")
+    if st.button("Save Configuration to .env"):
+        try:
+            # Create the .env file content
+            env_lines = [
+                "# WatsonX Configuration",
+                f"WATSONX_API_KEY={watsonx_api_key}",
+                f"WATSONX_URL={watsonx_url}",
+                f"WATSONX_MODEL={watsonx_model}",
+                # dotenv values end at the newline, so keep the JSON on one line
+                f"WATSONX_MODEL_PARAMS={' '.join(line.strip() for line in watsonx_model_params.splitlines())}",
+                f"WATSONX_PROJECT_ID={env.watsonx_project_id}",
+                "",
+                "# AWS S3 Configuration",
+                f"AWS_ACCESS_KEY_ID={aws_access_key}",
+                f"AWS_SECRET_ACCESS_KEY={aws_secret_key}",
+                f"AWS_REGION={aws_region}",
+                "",
+                "# Microsoft Graph API Configuration",
+                f"MS_CLIENT_ID={ms_client_id}",
+                f"MS_CLIENT_SECRET={ms_client_secret}",
+                f"MS_TENANT_ID={ms_tenant_id}",
+                f"MS_USER_EMAIL={ms_user_email}",
+                "",
+                "# Auto-initialization",
+                "AUTO_INITIALIZE=true",
+            ]
+            env_content = "\n".join(env_lines) + "\n"
+            
+            # Write to .env file
+            if save_env_file(env_content):
+                st.success("Configuration saved to .env file successfully!")
+            else:
+                st.info("Configuration is already up to date in the .env file")
+        except Exception as e:
+            st.error(f"Error saving configuration: {str(e)}")
 
 
-    WATSONX_API_KEY={watsonx_api_key}
-    WATSONX_URL={watsonx_url}
-    WATSONX_MODEL={watsonx_model}
-    WATSONX_MODEL_PARAMS={watsonx_model_params}
-    WATSONX_PROJECT_ID={os.getenv("WATSONX_PROJECT_ID", "ea1bfd72-28d6-4a4d-8668-c1de89865515")}
+def main():
+    st.title('WatsonX PDF Agent 🤖')
+    st.caption("🚀 An enhanced agent powered by WatsonX.ai with AWS S3 & Microsoft 365 Email capabilities")
 
-    # AWS S3 Configuration
-    AWS_ACCESS_KEY_ID={aws_access_key}
-    AWS_SECRET_ACCESS_KEY={aws_secret_key}
-    AWS_REGION={aws_region}
+    # Session state initialization, copying mutable defaults so sessions don't share them
+    for key, value in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = copy.deepcopy(value)
+        
+    env = get_env_config()
+        
+    # Initialize autonomous features if configured
+    if 'autonomous_enabled' not in st.session_state:
+        st.session_state.autonomous_enabled = env.autonomous_enabled
 
-    # Microsoft Graph API Configuration
-    MS_CLIENT_ID={ms_client_id}
-    MS_CLIENT_SECRET={ms_client_secret}
-    MS_TENANT_ID={ms_tenant_id}
-    MS_USER_EMAIL={ms_user_email}
+    # Auto-initialize connections if enabled, once per session so failed
+    # connections aren't retried on every rerun
+    if env.auto_initialize and not st.session_state.auto_init_attempted:
+        st.session_state.auto_init_attempted = True
+        
+        # Collect the independent connection steps so they can run concurrently
+        auto_init_tasks = {}
+        
+        if env.watsonx_api_key and st.session_state.pdf_agent is None:
+            auto_init_tasks["watsonx"] = partial(auto_init_watsonx_model, env)
+            
+            # MS Graph is only auto-connected alongside the WatsonX model
+            if (env.ms_client_id and env.ms_client_secret and 
+                env.ms_tenant_id and env.ms_user_email and
+                st.session_state.ms_graph_client is None):
+                auto_init_tasks["ms_graph"] = partial(auto_init_ms_graph_client, env)
+        
+        if env.aws_access_key_id and env.aws_secret_access_key and st.session_state.aws_s3_client is None:
+            auto_init_tasks["aws_s3"] = partial(auto_init_s3_client, env)
+        
+        if auto_init_tasks:
+            with st.spinner("Connecting to services..."):
+                results = run_auto_init_tasks(auto_init_tasks)
+            
+            # Microsoft Graph client
+            ms_graph_client = st.session_state.ms_graph_client
+            if "ms_graph" in results:
+                ms_graph_client, error = results["ms_graph"]
+                if error is None:
+                    st.session_state.ms_graph_client = ms_graph_client
+                    st.success("Auto-connected to Microsoft Graph API successfully")
+                elif isinstance(error, ConnectionError):
+                    st.warning("Failed to auto-connect to Microsoft Graph API")
+                else:
+                    st.warning(f"Error auto-initializing Microsoft Graph client: {str(error)}")
+            
+            # WatsonX model, PDF agent and document classifier
+            if "watsonx" in results:
+                model, error = results["watsonx"]
+                if error is None:
+                    try:
+                        from pdf_agent import WatsonxPDFAgent
+                        
+                        # Initialize PDF agent with MS Graph client
+                        st.session_state.pdf_agent = WatsonxPDFAgent(
+                            model, 
+                            pdf_search_tool=None,
+                            ms_graph_client=ms_graph_client
+                        )
 
-    # Auto-initialization
-    AUTO_INITIALIZE=true
-    """
-                
-                # Write to .env file
-                with open(".env", "w") as f:
-                    f.write(env_content)
+                        # Initialize the document classifier
+                        st.session_state.document_classifier = DocumentClassifier(
+                            model,  # This is the WatsonX model instance
+                            pdf_search_tool=None
+                        )
+                        logger.info("Document classifier auto-initialized")
+                        st.success("WatsonX model auto-initialized successfully")
+                    except Exception as e:
+                        error = e
                 
-                st.success("Configuration saved to .env file successfully!")
-            except Exception as e:
-                st.error(f"Error saving configuration: {str(e)}")
+                if error is not None:
+                    st.error(f"Error auto-initializing WatsonX model: {str(error)}")
+                    logger.error(f"Error auto-initializing WatsonX model: {str(error)}")
+            
+            # AWS S3 client
+            if "aws_s3" in results:
+                s3_result, error = results["aws_s3"]
+                if error is None:
+                    s3_client, buckets = s3_result
+                    st.session_state.aws_s3_client = s3_client
+                    
+                    if buckets:
+                        st.session_state.aws_buckets = buckets
+                        st.success(f"Auto-connected to AWS S3: Found {len(buckets)} buckets")
+                    else:
+                        st.warning("No buckets found")
+                elif isinstance(error, ConnectionError):
+                    st.error("Failed to auto-connect to AWS S3")
+                else:
+                    st.error(f"Error auto-connecting to AWS S3: {str(error)}")
+                    logger.error(f"Error auto-connecting to AWS S3: {str(error)}")
+
+    # Main layout with tabs
+    tab1, tab2 = st.tabs(["Chat", "Configuration"])
+
+    try:
+        add_autonomous_features(tab1, tab2)
+    except Exception as e:
+        logger.error(f"Error initializing autonomous features: {str(e)}")
+        st.error("There was an error setting up autonomous features. You can still use the basic functionality.")
+    
+    # Tab 1: Chat
+    with tab1:
+        render_chat_tab()
+    
+    # Report background email sends while any are in flight
+    if st.session_state.pending_emails:
+        report_pending_emails()
+    
+    # Tab 2: Configuration
+    with tab2:
+        render_config_tab()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,7 @@
 # aws_client.py
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, ClientError
 import logging
 import os
@@ -9,6 +11,33 @@ import tempfile
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Number of parallel ranged GETs per download
+DEFAULT_S3_MAX_CONCURRENCY = 10
+try:
+    S3_MAX_CONCURRENCY = max(1, int(os.getenv("S3_MAX_CONCURRENCY", DEFAULT_S3_MAX_CONCURRENCY)))
+except ValueError:
+    logger.warning(f"S3_MAX_CONCURRENCY must be a whole number; using {DEFAULT_S3_MAX_CONCURRENCY}")
+    S3_MAX_CONCURRENCY = DEFAULT_S3_MAX_CONCURRENCY
+
+# Fetch objects larger than 8 MiB as parallel 16 MiB ranged GETs, reading the
+# response bodies in 1 MiB chunks instead of the default 256 KiB. The transfer
+# client is left on boto3's "auto" default, which only switches to the AWS Common
+# Runtime when awscrt is installed and the instance type benefits from it.
+DOWNLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    io_chunksize=1024 * 1024,
+    use_threads=True
+)
+
+# Keep enough pooled connections for every download worker, with headroom for
+# listing calls made while a download is running
+CLIENT_CONFIG = Config(
+    max_pool_connections=S3_MAX_CONCURRENCY + 10,
+    retries={'max_attempts': 10, 'mode': 'adaptive'}
+)
+
 class AWSS3Client:
     """AWS S3 Client for handling PDF documents"""
     
@@ -25,9 +54,13 @@ class AWSS3Client:
         self.region_name = region_name
         self.s3_client = None
     
-    def connect(self):
+    def connect(self, bucket_name=None):
         """Connect to AWS S3
         
+        Args:
+            bucket_name (str, optional): Bucket used to test the connection. If None,
+                the connection is tested by listing all buckets.
+        
         Returns:
             bool: True if connection successful, False otherwise
         """
@@ -36,10 +69,14 @@ class AWSS3Client:
                 's3',
                 aws_access_key_id=self.aws_access_key,
                 aws_secret_access_key=self.aws_secret_key,
-                region_name=self.region_name
+                region_name=self.region_name,
+                config=CLIENT_CONFIG
             )
-            # Test connection by listing buckets
-            self.s3_client.list_buckets()
+            # Test connection against the known bucket, or by listing buckets
+            if bucket_name:
+                self.s3_client.head_bucket(Bucket=bucket_name)
+            else:
+                self.s3_client.list_buckets()
             logger.info("Successfully connected to AWS S3")
             return True
         except NoCredentialsError:
@@ -86,43 +123,15 @@ class AWSS3Client:
                 return []
         
         try:
-            # Remove trailing slash if present to ensure consistent directory handling
-            if prefix and prefix.endswith('/'):
-                prefix = prefix[:-1]
-                
-            # If prefix is provided, add a trailing slash to list contents of that folder
-            delimiter = '/'
-            prefix_with_slash = f"{prefix}/" if prefix else ""
+            prefix_with_slash = self._folder_prefix(prefix)
             
             response = self.s3_client.list_objects_v2(
                 Bucket=bucket_name,
                 Prefix=prefix_with_slash,
-                Delimiter=delimiter
+                Delimiter='/'
             )
             
-            folders = []
-            
-            # CommonPrefixes are folders
-            if 'CommonPrefixes' in response:
-                for common_prefix in response['CommonPrefixes']:
-                    # Extract folder name from the prefix (remove the trailing slash)
-                    folder_path = common_prefix['Prefix']
-                    
-                    # Remove the prefix we searched for to get just the folder name
-                    if prefix_with_slash:
-                        folder_name = folder_path[len(prefix_with_slash):]
-                    else:
-                        folder_name = folder_path
-                        
-                    # Remove trailing slash if present
-                    if folder_name.endswith('/'):
-                        folder_name = folder_name[:-1]
-                        
-                    folders.append({
-                        'name': folder_name,
-                        'path': folder_path,
-                        'type': 'folder'
-                    })
+            folders = self._extract_folders(response, prefix_with_slash)
             
             logger.info(f"Found {len(folders)} folders in bucket {bucket_name} with prefix {prefix}")
             return folders
@@ -130,27 +139,51 @@ class AWSS3Client:
             logger.error(f"Error listing folders in bucket {bucket_name}: {str(e)}")
             return []
     
-    def list_pdfs(self, bucket_name, prefix="", max_keys=100):
+    def list_pdfs(self, bucket_name, prefix="", max_keys=1000):
         """List all PDF files in a bucket with folder structure
         
+        Folders and files come back in the same delimited listing, which is read
+        page by page until max_keys folders and PDFs have been found, so other
+        objects in the folder don't push PDFs out of the results.
+        
         Args:
             bucket_name (str): Name of the S3 bucket
             prefix (str, optional): Prefix/folder to search in. Defaults to "".
-            max_keys (int, optional): Maximum number of keys to return. Defaults to 100.
+            max_keys (int, optional): Maximum number of folders and files to return. Defaults to 1000.
             
         Returns:
             list: List of PDF items with name, path, and type
         """
-        # Get folders first
-        folders = self.list_folders(bucket_name, prefix)
-        
-        # Get PDF files in the current prefix
-        pdfs = self.list_pdf_files(bucket_name, prefix, max_keys)
-        
-        # Combine the results
-        results = folders + pdfs
+        if not self.s3_client:
+            if not self.connect():
+                return []
         
-        return sorted(results, key=lambda x: (x['type'], x['name']))
+        try:
+            prefix_with_slash = self._folder_prefix(prefix)
+            
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
+                Bucket=bucket_name,
+                Prefix=prefix_with_slash,
+                Delimiter='/',
+                PaginationConfig={'PageSize': 1000}
+            )
+            
+            folders = []
+            pdfs = []
+            for page in pages:
+                folders.extend(self._extract_folders(page, prefix_with_slash))
+                pdfs.extend(self._extract_pdf_files(page))
+                if len(folders) + len(pdfs) >= max_keys:
+                    if page.get('IsTruncated') or len(folders) + len(pdfs) > max_keys:
+                        logger.warning(f"Listing of bucket {bucket_name} with prefix {prefix} was truncated at {max_keys} items")
+                    break
+            
+            logger.info(f"Found {len(folders)} folders and {len(pdfs)} PDF files in bucket {bucket_name} with prefix {prefix}")
+            return sorted(folders + pdfs, key=lambda x: (x['type'], x['name']))[:max_keys]
+        except Exception as e:
+            logger.error(f"Error listing PDFs in bucket {bucket_name}: {str(e)}")
+            return []
     
     def list_pdf_files(self, bucket_name, prefix="", max_keys=100):
         """List PDF files (not folders) in a bucket
@@ -168,13 +201,7 @@ class AWSS3Client:
                 return []
         
         try:
-            # Remove trailing slash if present to ensure consistent directory handling
-            clean_prefix = prefix
-            if clean_prefix and clean_prefix.endswith('/'):
-                clean_prefix = clean_prefix[:-1]
-                
-            # If prefix exists, add trailing slash
-            prefix_with_slash = f"{clean_prefix}/" if clean_prefix else ""
+            prefix_with_slash = self._folder_prefix(prefix)
             
             response = self.s3_client.list_objects_v2(
                 Bucket=bucket_name,
@@ -183,27 +210,7 @@ class AWSS3Client:
                 MaxKeys=max_keys
             )
             
-            pdfs = []
-            
-            # Contents are files (not folders)
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    # Skip folder markers (objects ending with /)
-                    if obj['Key'].endswith('/'):
-                        continue
-                        
-                    # Only include PDF files
-                    if obj['Key'].lower().endswith('.pdf'):
-                        # Extract the filename without the path
-                        filename = os.path.basename(obj['Key'])
-                        
-                        pdfs.append({
-                            'name': filename,
-                            'path': obj['Key'],
-                            'size': obj['Size'],
-                            'last_modified': obj['LastModified'],
-                            'type': 'file'
-                        })
+            pdfs = self._extract_pdf_files(response)
             
             logger.info(f"Found {len(pdfs)} PDF files in bucket {bucket_name} with prefix {prefix}")
             return pdfs
@@ -211,6 +218,54 @@ class AWSS3Client:
             logger.error(f"Error listing PDF files in bucket {bucket_name}: {str(e)}")
             return []
     
+    def _folder_prefix(self, prefix):
+        """Normalize a folder prefix to end with exactly one slash ("" for the bucket root)"""
+        # Remove trailing slash if present to ensure consistent directory handling
+        if prefix and prefix.endswith('/'):
+            prefix = prefix[:-1]
+        
+        # If prefix exists, add trailing slash
+        return f"{prefix}/" if prefix else ""
+    
+    def _extract_folders(self, response, prefix_with_slash):
+        """Extract folder items from a delimited list_objects_v2 response"""
+        folders = []
+        
+        # CommonPrefixes are folders
+        for common_prefix in response.get('CommonPrefixes', []):
+            folder_path = common_prefix['Prefix']
+            
+            # Remove the prefix we searched for and the trailing slash to get just the folder name
+            folder_name = folder_path[len(prefix_with_slash):]
+            if folder_name.endswith('/'):
+                folder_name = folder_name[:-1]
+                
+            folders.append({
+                'name': folder_name,
+                'path': folder_path,
+                'type': 'folder'
+            })
+        return folders
+    
+    def _extract_pdf_files(self, response):
+        """Extract PDF file items from a list_objects_v2 response"""
+        pdfs = []
+        
+        # Contents are files (not folders)
+        for obj in response.get('Contents', []):
+            # Skip folder markers and non-PDF files
+            if obj['Key'].endswith('/') or not obj['Key'].lower().endswith('.pdf'):
+                continue
+            
+            pdfs.append({
+                'name': os.path.basename(obj['Key']),
+                'path': obj['Key'],
+                'size': obj['Size'],
+                'last_modified': obj['LastModified'],
+                'type': 'file'
+            })
+        return pdfs
+    
     def list_objects(self, bucket_name, prefix="", max_keys=100):
         """List objects in a bucket with optional prefix
         
@@ -253,13 +308,15 @@ class AWSS3Client:
             logger.error(f"Error listing objects in bucket {bucket_name}: {str(e)}")
             return []
     
-    def download_file(self, bucket_name, object_key, output_path=None):
+    def download_file(self, bucket_name, object_key, output_path=None, expected_size=None):
         """Download a file from S3 to local filesystem
         
         Args:
             bucket_name (str): Name of the S3 bucket
             object_key (str): Key of the object to download
             output_path (str, optional): Local path to save the file. If None, a temporary file is created.
+            expected_size (int, optional): Object size, if known, used to reserve the file's
+                space before the parallel parts are written
             
         Returns:
             str: Path to the downloaded file if successful, None otherwise
@@ -275,13 +332,60 @@ class AWSS3Client:
                 output_path = temp_file.name
                 temp_file.close()
             
-            self.s3_client.download_file(bucket_name, object_key, output_path)
+            # Stream the object straight into the output file, in parallel parts for large PDFs
+            with open(output_path, 'wb') as output_file:
+                # Reserve the full size up front so large PDFs are written into one extent
+                preallocated = False
+                if expected_size and expected_size >= 1024 * 1024 and hasattr(os, "posix_fallocate"):
+                    try:
+                        os.posix_fallocate(output_file.fileno(), 0, expected_size)
+                        preallocated = True
+                    except OSError:
+                        pass
+                
+                # Progress callbacks report the bytes received (negative when a part is retried)
+                received = []
+                self.s3_client.download_fileobj(
+                    bucket_name,
+                    object_key,
+                    output_file,
+                    Callback=received.append,
+                    Config=DOWNLOAD_TRANSFER_CONFIG
+                )
+                
+                # The object may have been replaced by a smaller one since expected_size was read
+                if preallocated:
+                    output_file.truncate(sum(received))
             logger.info(f"Successfully downloaded {object_key} to {output_path}")
             return output_path
         except Exception as e:
             logger.error(f"Error downloading file {object_key} from bucket {bucket_name}: {str(e)}")
             return None
     
+    def get_object_info(self, bucket_name, object_key):
+        """Get the metadata of an object without downloading it
+        
+        Args:
+            bucket_name (str): Name of the S3 bucket
+            object_key (str): Key of the object
+        
+        Returns:
+            dict: The object's ETag and ContentLength, or None if they couldn't be retrieved
+        """
+        if not self.s3_client:
+            if not self.connect():
+                return None
+        
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+            return {
+                'ETag': response.get('ETag'),
+                'ContentLength': response.get('ContentLength')
+            }
+        except Exception as e:
+            logger.error(f"Error getting metadata for {object_key} in bucket {bucket_name}: {str(e)}")
+            return None
+    
     def upload_file(self, file_path, bucket_name, object_key=None):
         """Upload a file to S3
         
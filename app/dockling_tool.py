@@ -11,6 +11,32 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _copy_file(src, dst):
+    """Copy a file, sharing its data blocks with the source where possible
+    
+    os.copy_file_range copies inside the kernel and makes a reflink on
+    filesystems that support it (Btrfs, XFS); elsewhere shutil.copy2 is used.
+    
+    Args:
+        src (str): Path to the source file
+        dst (str): Path to the destination file
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+                remaining = os.fstat(src_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError as e:
+            logger.info(f"copy_file_range unavailable, falling back to copy2: {str(e)}")
+    shutil.copy2(src, dst)
+
 class DocklingPDFTool:
     """PDF document tool using Dockling for integration with WatsonX"""
     
@@ -45,10 +71,14 @@ class DocklingPDFTool:
             knowledge_file_path = os.path.join(knowledge_dir, filename)
             logger.info(f"Copying file to: {knowledge_file_path}")
             
-            # Copy the file if it's not already there
+            # Link the file if it's not already there, copying only across filesystems
             if not os.path.exists(knowledge_file_path) and os.path.exists(abs_path):
-                shutil.copy2(abs_path, knowledge_file_path)
-                logger.info(f"File copied successfully")
+                try:
+                    os.link(abs_path, knowledge_file_path)
+                    logger.info(f"File linked successfully")
+                except OSError:
+                    _copy_file(abs_path, knowledge_file_path)
+                    logger.info(f"File copied successfully")
             
             # Verify the file exists
             if not os.path.exists(knowledge_file_path):
@@ -317,7 +317,7 @@ class DocumentClassifier:
         # Default fallback
         return (DocumentCategory.GENERAL, 0.3, "Classification based on fallback heuristics - limited confidence", None)
     
-    def organize_document(self, aws_s3_client, pdf_path, bucket_name, original_key=None):
+    def organize_document(self, aws_s3_client, pdf_path, bucket_name, original_key=None, classification=None):
         """Classify and organize a document in AWS S3
         
         Args:
@@ -325,13 +325,17 @@ class DocumentClassifier:
             pdf_path (str): Path to the PDF file
             bucket_name (str): S3 bucket name
             original_key (str, optional): Original S3 object key
+            classification (tuple, optional): Result of classify_document for this
+                document. If None, the document is classified first.
             
         Returns:
             dict: Result of the organization operation
         """
         try:
-            # 1. Classify the document
-            category, confidence, reasoning, custom_category_name = self.classify_document(pdf_path, detect_custom_categories=True)
+            # 1. Classify the document, unless the caller already did
+            if classification is None:
+                classification = self.classify_document(pdf_path, detect_custom_categories=True)
+            category, confidence, reasoning, custom_category_name = classification
             
             # 2. Determine target folder
             if category == DocumentCategory.CUSTOM and custom_category_name:
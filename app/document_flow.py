@@ -3,6 +3,8 @@ from crewai.flow.flow import Flow, listen, start  # Updated import path
 from crewai import Agent, Task, Crew
 import logging
 import os
+import tempfile
+import traceback
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
@@ -149,7 +151,6 @@ class DocumentProcessingFlow:
         """
         try:
             # Download the document
-            import tempfile
             temp_dir = os.path.join(tempfile.gettempdir(), "pdf_agent")
             os.makedirs(temp_dir, exist_ok=True)
             local_path = os.path.join(temp_dir, os.path.basename(object_key))
@@ -255,7 +256,6 @@ class DocumentProcessingFlow:
             }
         except Exception as e:
             logger.error(f"Error scanning bucket {bucket_name}: {str(e)}")
-            import traceback
             logger.error(traceback.format_exc())
             return {"success": False, "error": str(e)}
 
@@ -3,13 +3,48 @@ import requests
 import base64
 import logging
 import os
+import time
 import tempfile
 from datetime import datetime
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Refresh the access token this many seconds before it actually expires
+TOKEN_EXPIRY_MARGIN = 300
+
+# Only attachments up to this size are kept encoded in memory for resending, so
+# the cache holds at most a few tens of MiB
+ATTACHMENT_CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+def _encode_attachment(file_path):
+    """Read and base64-encode a file
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        str: Base64-encoded file content
+    """
+    with open(file_path, "rb") as attachment_file:
+        return base64.b64encode(attachment_file.read()).decode("utf-8")
+
+@lru_cache(maxsize=4)
+def _encode_small_attachment(file_path, file_size, modified_time):
+    """Read and base64-encode a small file, reused until the file changes
+    
+    Args:
+        file_path (str): Path to the file
+        file_size (int): File size, part of the cache key
+        modified_time (float): File modification time, part of the cache key
+        
+    Returns:
+        str: Base64-encoded file content
+    """
+    return _encode_attachment(file_path)
+
 class MSGraphClient:
     """Microsoft Graph API Client for sending emails"""
     
@@ -20,20 +55,29 @@ class MSGraphClient:
         self.tenant_id = tenant_id
         self.user_email = user_email
         self.access_token = None
+        self.token_expires_at = 0
+        self.msal_app = None
         self.scopes = ['https://graph.microsoft.com/.default']
+        
+        # Reuse connections to Microsoft Graph across requests
+        self.session = requests.Session()
     
     def get_token(self):
         """Get Microsoft Graph API access token"""
         try:
-            app = msal.ConfidentialClientApplication(
-                self.client_id,
-                authority=f"https://login.microsoftonline.com/{self.tenant_id}",
-                client_credential=self.client_secret
-            )
-            result = app.acquire_token_for_client(scopes=self.scopes)
+            # Keep one MSAL application so refreshes reuse its token cache and
+            # authority metadata instead of rediscovering the tenant each time
+            if self.msal_app is None:
+                self.msal_app = msal.ConfidentialClientApplication(
+                    self.client_id,
+                    authority=f"https://login.microsoftonline.com/{self.tenant_id}",
+                    client_credential=self.client_secret
+                )
+            result = self.msal_app.acquire_token_for_client(scopes=self.scopes)
             
             if "access_token" in result:
                 self.access_token = result["access_token"]
+                self.token_expires_at = time.time() + result.get("expires_in", 3600) - TOKEN_EXPIRY_MARGIN
                 logger.info("Successfully obtained Microsoft Graph API token")
                 return True
             else:
@@ -43,9 +87,13 @@ class MSGraphClient:
             logger.error(f"Error getting Microsoft Graph token: {str(e)}")
             return False
     
+    def has_valid_token(self):
+        """Check whether the cached access token can still be used"""
+        return bool(self.access_token) and time.time() < self.token_expires_at
+    
     def send_email(self, to_email, subject, body, attachments=None, cc_email=None, bcc_email=None):
         """Send email using Microsoft Graph API"""
-        if not self.access_token and not self.get_token():
+        if not self.has_valid_token() and not self.get_token():
             return False
         
         try:
@@ -75,7 +123,7 @@ class MSGraphClient:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"https://graph.microsoft.com/v1.0/users/{self.user_email}/sendMail",
                 headers=headers,
                 json=email_message
@@ -99,8 +147,12 @@ class MSGraphClient:
                 logger.warning(f"Attachment file not found: {attachment_path}")
                 continue
             
-            with open(attachment_path, "rb") as attachment_file:
-                encoded_content = base64.b64encode(attachment_file.read()).decode("utf-8")
+            # Resending the same small document reuses the encoded content
+            file_stat = os.stat(attachment_path)
+            if file_stat.st_size <= ATTACHMENT_CACHE_MAX_BYTES:
+                encoded_content = _encode_small_attachment(attachment_path, file_stat.st_size, file_stat.st_mtime)
+            else:
+                encoded_content = _encode_attachment(attachment_path)
             
             attachment_list.append({
                 "@odata.type": "#microsoft.graph.fileAttachment",
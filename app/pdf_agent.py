@@ -4,6 +4,10 @@ import tempfile
 import logging
 import os
 import json
+import time
+import re
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the Dockling tool
 from dockling_tool import DocklingPDFTool
@@ -12,6 +16,25 @@ from dockling_tool import DocklingPDFTool
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Minimum interval (seconds) and batch size (characters) between streamed
+# chunks, so the chat re-renders at roughly 20 Hz instead of once per token
+STREAM_FLUSH_INTERVAL = 0.05
+STREAM_FLUSH_MIN_CHARS = 8
+
+# Worker pool for sending emails in the background; it lives as long as the
+# process so queued emails survive Streamlit reruns
+EMAIL_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Instructions appended to the summary and recommendation prompts
+SUMMARY_INSTRUCTIONS = """
+            Please provide a comprehensive summary of the document. Cover key points, main findings, 
+            and any important details that would be relevant to someone who hasn't read the document.
+            """
+RECOMMENDATION_INSTRUCTIONS = """
+            Based on this document, what recommendations would you make? What are the next steps 
+            or actions that should be taken? Please provide specific and actionable recommendations.
+            """
+
 class WatsonxPDFAgent:
     """PDF Agent powered by WatsonX and CrewAI"""
     
@@ -146,79 +169,142 @@ class WatsonxPDFAgent:
                 # Process reminder logic...
                 pass
             
-            # Check for summarization request
-            elif "summarize" in query.lower() or "summary" in query.lower():
-                summary_prompt = f"""
-                Please provide a comprehensive summary of the document. Cover key points, main findings, 
-                and any important details that would be relevant to someone who hasn't read the document.
-                """
-                
-                # Search the document and generate the summary
-                content = self.pdf_search_tool.search("document summary key points main topics")
-                prompt = f"""
-                Based on the following document content, please provide a comprehensive summary:
-                
-                {content}
-                
-                {summary_prompt}
-                """
-                
-                response = self.model.generate_text(prompt)
-                
-                # Save the summary in session state for potential email use
-                import streamlit as st
-                st.session_state.document_summary = response
-                
-                return response
-            
-            # Check for recommendations request
-            elif "recommend" in query.lower() or "recommendation" in query.lower() or "next steps" in query.lower():
-                recommendation_prompt = f"""
-                Based on this document, what recommendations would you make? What are the next steps 
-                or actions that should be taken? Please provide specific and actionable recommendations.
-                """
-                
-                # Search the document and generate recommendations
-                content = self.pdf_search_tool.search("key findings recommendations next steps actions")
-                prompt = f"""
-                Based on the following document content, please provide recommendations and next steps:
-                
-                {content}
-                
-                {recommendation_prompt}
-                """
-                
-                response = self.model.generate_text(prompt)
-                
-                # Save the recommendations in session state for potential email use
-                import streamlit as st
-                st.session_state.document_recommendations = response
-                
-                return response
-                
-            # For regular queries, use the PDF search tool
-            if self.pdf_search_tool:
-                content = self.pdf_search_tool.search(query)
-                
-                prompt = f"""
-                Based on the following document content, please answer the query:
-                
-                Document content:
-                {content}
-                
-                Query: {query}
-                
-                Please provide a detailed and accurate response.
-                """
-                
-                return self.model.generate_text(prompt)
-            else:
+            # Summaries, recommendations and regular queries are answered by the model
+            generation = self._build_generation_prompt(query)
+            if generation is None:
                 return "Error: PDF search tool not initialized. Please try uploading the document again."
+            
+            prompt, state_key = generation
+            response = self.model.generate_text(prompt)
+            
+            # Save summaries/recommendations in session state for potential email use
+            if state_key:
+                import streamlit as st
+                st.session_state[state_key] = response
+            
+            return response
                 
         except Exception as e:
             logger.error(f"Error in process_document: {str(e)}")
             return f"Error processing document: {str(e)}"
     
+    def process_document_stream(self, pdf_path, query):
+        """Process a document with a query, yielding the response as it is generated
+        
+        Command queries (email, invalid input) yield their full response at once;
+        summaries, recommendations and regular questions are streamed from WatsonX.
+        
+        Args:
+            pdf_path (str): Path to the document
+            query (str): User query or command
+            
+        Yields:
+            str: Chunks of the response text
+            
+        Raises:
+            RuntimeError: If the PDF search tool is not initialized
+            Exception: If generation fails, possibly after some chunks were yielded,
+                so callers never mistake a partial response for a complete one
+        """
+        if "send email to:" in query.lower():
+            email_address = query.lower().split("send email to:", 1)[1].strip()
+            if self.ms_graph_client and "@" in email_address and "." in email_address:
+                # Send in the background so the chat isn't blocked on Microsoft Graph
+                yield self.queue_document_email(pdf_path, email_address)
+            else:
+                yield self.process_document(pdf_path, query)
+            return
+        
+        try:
+            generation = self._build_generation_prompt(query)
+            if generation is None:
+                raise RuntimeError("PDF search tool not initialized. Please try uploading the document again.")
+            
+            prompt, state_key = generation
+            
+            chunks = []
+            pending = []
+            pending_chars = 0
+            last_flush = time.monotonic()
+            for chunk in self.model.generate_text_stream(prompt):
+                chunks.append(chunk)
+                pending.append(chunk)
+                pending_chars += len(chunk)
+                
+                # Batch tokens so the UI is not re-rendered on every delta
+                now = time.monotonic()
+                if pending_chars >= STREAM_FLUSH_MIN_CHARS or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                    yield "".join(pending)
+                    pending = []
+                    pending_chars = 0
+                    last_flush = now
+            
+            if pending:
+                yield "".join(pending)
+            
+            # Save summaries/recommendations in session state for potential email use
+            if state_key:
+                import streamlit as st
+                response = "".join(chunks)
+                st.session_state[state_key] = response
+        except Exception as e:
+            logger.error(f"Error in process_document_stream: {str(e)}")
+            raise
+    
+    def _build_generation_prompt(self, query):
+        """Build the model prompt for a summary, recommendation or regular query
+        
+        Args:
+            query (str): User query
+            
+        Returns:
+            tuple: (prompt, session_state_key) where the key names the session state
+                entry the response should be saved under, or None if the PDF search
+                tool is not initialized
+        """
+        # Check for summarization request
+        if "summarize" in query.lower() or "summary" in query.lower():
+            # Search the document and generate the summary
+            content = self.pdf_search_tool.search("document summary key points main topics")
+            prompt = f"""
+            Based on the following document content, please provide a comprehensive summary:
+            
+            {content}
+            
+            {SUMMARY_INSTRUCTIONS}
+            """
+            return prompt, "document_summary"
+        
+        # Check for recommendations request
+        if "recommend" in query.lower() or "recommendation" in query.lower() or "next steps" in query.lower():
+            # Search the document and generate recommendations
+            content = self.pdf_search_tool.search("key findings recommendations next steps actions")
+            prompt = f"""
+            Based on the following document content, please provide recommendations and next steps:
+            
+            {content}
+            
+            {RECOMMENDATION_INSTRUCTIONS}
+            """
+            return prompt, "document_recommendations"
+        
+        # For regular queries, use the PDF search tool
+        if not self.pdf_search_tool:
+            return None
+        
+        content = self.pdf_search_tool.search(query)
+        prompt = f"""
+        Based on the following document content, please answer the query:
+        
+        Document content:
+        {content}
+        
+        Query: {query}
+        
+        Please provide a detailed and accurate response.
+        """
+        return prompt, None
+    
     def handle_email_request(self, query, pdf_path):
         """Handle a request to send an email about the document
         
@@ -244,7 +330,6 @@ class WatsonxPDFAgent:
             if len(parts) > 1:
                 recipient_part = parts[1].strip()
                 # Extract email address if it's in a typical format
-                import re
                 email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', recipient_part)
                 if email_match:
                     recipient = email_match.group(0)
@@ -302,11 +387,7 @@ class WatsonxPDFAgent:
         if not self.ms_graph_client:
             return "I can't set reminders at the moment because the Microsoft Graph client is not configured. Please set up email in the Configuration tab first."
         
-        # Try to extract a date from the query
-        import re
-        from datetime import datetime, timedelta
-        
-        # Look for "in X days/weeks/months" patterns
+        # Try to extract a date from the query, looking for "in X days/weeks/months" patterns
         time_patterns = {
             'day': re.compile(r'in\s+(\d+)\s+day', re.IGNORECASE),
             'week': re.compile(r'in\s+(\d+)\s+week', re.IGNORECASE),
@@ -407,8 +488,96 @@ class WatsonxPDFAgent:
                 "date": "Unknown",
                 "pages": 0
             }
-    # Add this method to your WatsonxPDFAgent class in pdf_agent.py
-
+    def _collect_email_content(self):
+        """Gather the summary, recommendations and classification for a document email
+        
+        Reuses results saved in session state and generates a summary if none exists.
+        Must be called from the Streamlit script thread.
+        
+        Returns:
+            tuple: (summary, recommendations, classification)
+        """
+        import streamlit as st
+        
+        summary = None
+        recommendations = None
+        classification = None
+        
+        # Look for summary in session state or generate one
+        if hasattr(st.session_state, 'document_summary') and st.session_state.document_summary:
+            logger.info("Using existing document summary from session state")
+            summary = st.session_state.document_summary
+        else:
+            # Generate a quick summary on the fly
+            logger.info("Generating new document summary")
+            content = self.pdf_search_tool.search("key points main topics executive summary")
+            summary_prompt = f"""
+            Based on the following document content, please provide a brief executive summary (3-5 key points):
+            
+            {content}
+            """
+            summary = self.model.generate_text(summary_prompt)
+            st.session_state.document_summary = summary
+        
+        # Look for recommendations in session state
+        if hasattr(st.session_state, 'document_recommendations') and st.session_state.document_recommendations:
+            logger.info("Using existing document recommendations from session state")
+            recommendations = st.session_state.document_recommendations
+        
+        # Look for classification in session state
+        if hasattr(st.session_state, 'document_classification') and st.session_state.document_classification:
+            logger.info("Using existing document classification from session state")
+            classification = st.session_state.document_classification
+        
+        return summary, recommendations, classification
+    
+    def queue_document_email(self, pdf_path, to_email):
+        """Prepare a document email and send it on a background worker
+        
+        The summary is prepared on the calling thread; the Microsoft Graph request
+        runs on EMAIL_EXECUTOR. The future is appended to
+        st.session_state.pending_emails as a (to_email, future) tuple so the UI
+        can report the outcome once it completes.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            to_email (str): Recipient email address
+            
+        Returns:
+            str: Response text for the chat
+        """
+        import streamlit as st
+        
+        try:
+            document_name = os.path.basename(pdf_path)
+            summary, recommendations, classification = self._collect_email_content()
+            
+            logger.info(f"Queueing email to {to_email} with document: {document_name}")
+            future = EMAIL_EXECUTOR.submit(
+                self.ms_graph_client.create_email_with_summary,
+                to_email=to_email,
+                document_name=document_name,
+                summary=summary,
+                pdf_path=pdf_path,
+                recommendations=recommendations,
+                classification=classification
+            )
+            
+            if 'pending_emails' not in st.session_state:
+                st.session_state.pending_emails = []
+            st.session_state.pending_emails.append((to_email, future))
+            
+            included_items = ["summary"]
+            if recommendations is not None:
+                included_items.append("recommendations")
+            if classification is not None:
+                included_items.append("classification")
+            
+            return f"📤 Sending email to {to_email} including the document and {', '.join(included_items)}. You'll be notified when it has been sent."
+        except Exception as e:
+            logger.error(f"Error in queue_document_email: {str(e)}")
+            return f"❌ Failed to send email: {str(e)}"
+    
     def send_document_email(self, pdf_path, to_email):
         """Send an email with document analysis based on available information
         
@@ -419,8 +588,6 @@ class WatsonxPDFAgent:
         Returns:
             dict: Result of the email sending operation
         """
-        import streamlit as st
-        
         if not self.ms_graph_client:
             return {
                 "success": False, 
@@ -430,37 +597,7 @@ class WatsonxPDFAgent:
         try:
             # Get document name
             document_name = os.path.basename(pdf_path)
-            
-            # Check if we have a summary for this document in session state
-            summary = None
-            recommendations = None
-            classification = None
-            
-            # Look for summary in session state or generate one
-            if hasattr(st.session_state, 'document_summary') and st.session_state.document_summary:
-                logger.info("Using existing document summary from session state")
-                summary = st.session_state.document_summary
-            else:
-                # Generate a quick summary on the fly
-                logger.info("Generating new document summary")
-                content = self.pdf_search_tool.search("key points main topics executive summary")
-                summary_prompt = f"""
-                Based on the following document content, please provide a brief executive summary (3-5 key points):
-                
-                {content}
-                """
-                summary = self.model.generate_text(summary_prompt)
-                st.session_state.document_summary = summary
-            
-            # Look for recommendations in session state
-            if hasattr(st.session_state, 'document_recommendations') and st.session_state.document_recommendations:
-                logger.info("Using existing document recommendations from session state")
-                recommendations = st.session_state.document_recommendations
-            
-            # Look for classification in session state
-            if hasattr(st.session_state, 'document_classification') and st.session_state.document_classification:
-                logger.info("Using existing document classification from session state")
-                classification = st.session_state.document_classification
+            summary, recommendations, classification = self._collect_email_content()
             
             # Send the email with all available information
             logger.info(f"Sending email to {to_email} with document: {document_name}")
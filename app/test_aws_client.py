@@ -0,0 +1,106 @@
+# test_aws_client.py
+import importlib
+import io
+
+import boto3
+import boto3.s3.transfer
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+import aws_client
+from aws_client import AWSS3Client, CLIENT_CONFIG
+
+PDF_BYTES = b"%PDF-1.4\n% test document\n%%EOF\n"
+
+def make_client():
+    """Create an S3 client with the app's client config that never reaches AWS"""
+    return boto3.client(
+        "s3",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+        config=CLIENT_CONFIG
+    )
+
+@pytest.fixture
+def reload_aws_client(monkeypatch):
+    """Reload aws_client with S3_MAX_CONCURRENCY set, restoring the module afterwards"""
+    def reload(value):
+        monkeypatch.setenv("S3_MAX_CONCURRENCY", value)
+        return importlib.reload(aws_client)
+    
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(aws_client)
+
+@pytest.mark.parametrize("value, expected", [("4", 4), ("0", 1), ("lots", 10)])
+def test_configs_follow_s3_max_concurrency(reload_aws_client, value, expected):
+    module = reload_aws_client(value)
+    
+    assert module.S3_MAX_CONCURRENCY == expected
+    assert module.DOWNLOAD_TRANSFER_CONFIG.max_concurrency == expected
+    assert module.CLIENT_CONFIG.max_pool_connections == expected + 10
+
+def test_download_file_without_awscrt(monkeypatch, tmp_path):
+    monkeypatch.setattr(boto3.s3.transfer, "HAS_CRT", False)
+    
+    client = make_client()
+    stubber = Stubber(client)
+    stubber.add_response(
+        "head_object",
+        {"ContentLength": len(PDF_BYTES), "ETag": '"etag"'},
+        {"Bucket": "bucket", "Key": "docs/report.pdf"}
+    )
+    stubber.add_response(
+        "get_object",
+        {
+            "Body": StreamingBody(io.BytesIO(PDF_BYTES), len(PDF_BYTES)),
+            "ContentLength": len(PDF_BYTES),
+            "ETag": '"etag"'
+        },
+        {"Bucket": "bucket", "Key": "docs/report.pdf"}
+    )
+    
+    s3 = AWSS3Client("testing", "testing", "us-east-1")
+    s3.s3_client = client
+    output_path = str(tmp_path / "report.pdf")
+    
+    with stubber:
+        result = s3.download_file("bucket", "docs/report.pdf", output_path, expected_size=len(PDF_BYTES))
+    
+    assert result == output_path
+    with open(output_path, "rb") as f:
+        assert f.read() == PDF_BYTES
+
+def test_download_file_truncates_stale_preallocation(monkeypatch, tmp_path):
+    monkeypatch.setattr(boto3.s3.transfer, "HAS_CRT", False)
+    
+    client = make_client()
+    stubber = Stubber(client)
+    stubber.add_response(
+        "head_object",
+        {"ContentLength": len(PDF_BYTES), "ETag": '"etag"'},
+        {"Bucket": "bucket", "Key": "docs/report.pdf"}
+    )
+    stubber.add_response(
+        "get_object",
+        {
+            "Body": StreamingBody(io.BytesIO(PDF_BYTES), len(PDF_BYTES)),
+            "ContentLength": len(PDF_BYTES),
+            "ETag": '"etag"'
+        },
+        {"Bucket": "bucket", "Key": "docs/report.pdf"}
+    )
+    
+    s3 = AWSS3Client("testing", "testing", "us-east-1")
+    s3.s3_client = client
+    output_path = str(tmp_path / "report.pdf")
+    
+    # Sized from an earlier, larger version of the object
+    with stubber:
+        result = s3.download_file("bucket", "docs/report.pdf", output_path, expected_size=2 * 1024 * 1024)
+    
+    assert result == output_path
+    with open(output_path, "rb") as f:
+        assert f.read() == PDF_BYTES